@@ -0,0 +1,162 @@
+"""Connection checkouts and transactions per write request.
+
+Runs `IPAddressService.add_ip_address` and `reblacklist_ip` against the
+database from DATABASE_URL and counts pool checkouts and commits per
+request. The same adapter calls made without a shared session (one
+session per call, as before units of work) are measured as a baseline:
+
+    python -m benchmarks.db_checkouts --requests 200
+
+Every IP created here is deleted again at the end.
+"""
+import argparse
+import asyncio
+import random
+import socket
+import struct
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine
+
+import settings
+from src.adapters.adapters_manager import AdaptersManager
+from src.api.schema import IPAddressCreate
+from src.bl.services.ip_address_service import IPAddressService
+from src.common.enums import IPStatus
+from src.common.ip_validation import parse_ip
+from src.db.managers.db_manager import DBManager
+
+
+class Counters:
+    def __init__(self) -> None:
+        self.checkouts = 0
+        self.commits = 0
+
+    def on_checkout(self, *args: Any) -> None:  # noqa: ANN401
+        self.checkouts += 1
+
+    def on_commit(self, *args: Any) -> None:  # noqa: ANN401
+        self.commits += 1
+
+
+def random_public_ips(count: int) -> list[str]:
+    ips: set[str] = set()
+    while len(ips) < count:
+        ip = socket.inet_ntoa(struct.pack(">I", random.getrandbits(32)))
+        try:
+            parse_ip(ip)
+        except ValueError:
+            continue
+        ips.add(ip)
+    return list(ips)
+
+
+async def measure(
+    name: str,
+    counters: Counters,
+    ips: list[str],
+    request: Callable[[str], Awaitable[Any]],
+) -> float:
+    counters.checkouts = counters.commits = 0
+    start = time.perf_counter()
+    for ip in ips:
+        await request(ip)
+    elapsed = time.perf_counter() - start
+
+    per_request = counters.checkouts / len(ips)
+    print(
+        f"{name:<28} {per_request:>6.2f} checkouts/req "
+        f"{counters.commits / len(ips):>6.2f} commits/req "
+        f"{elapsed / len(ips) * 1000:>7.2f} ms/req"
+    )
+    return per_request
+
+
+async def run(requests: int) -> bool:
+    engine = create_async_engine(
+        url=settings.DATABASE_URL,
+        pool_pre_ping=True,
+        pool_size=settings.DB_MAX_CONNECTIONS,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+    )
+    counters = Counters()
+    event.listen(engine.sync_engine, "checkout", counters.on_checkout)
+    event.listen(engine.sync_engine, "commit", counters.on_commit)
+
+    db_manager = DBManager(async_engine=engine)
+    adapters_manager = AdaptersManager(db_manager=db_manager)
+    ip_adapter = adapters_manager.ip_adapter
+    service = IPAddressService(adapters_manager=adapters_manager)
+
+    async def add_per_call(ip: str) -> None:
+        # The pre-unit-of-work flow: every adapter call is its own session.
+        if not await ip_adapter.check_ip_exists(ip=ip):
+            await ip_adapter.create_ip(
+                ip=ip,
+                status=IPStatus.BLACKLIST,
+                expires_at=datetime.now() + timedelta(days=1),
+                last_blacklist_at=datetime.now(),
+            )
+
+    async def reblacklist_per_call(ip: str) -> None:
+        await ip_adapter.get_ip_by_address(ip=ip)
+        await ip_adapter.update_ip(
+            ip=ip,
+            status=IPStatus.BLACKLIST,
+            last_blacklist_at=datetime.now(),
+        )
+
+    async def archive(ips: list[str]) -> None:
+        for ip in ips:
+            await ip_adapter.update_ip(ip=ip, status=IPStatus.ARCHIVED)
+
+    baseline_ips = random_public_ips(requests)
+    uow_ips = random_public_ips(requests)
+    results: dict[str, float] = {}
+
+    try:
+        results["add per call"] = await measure(
+            "add_ip_address (per call)", counters, baseline_ips, add_per_call,
+        )
+        results["add uow"] = await measure(
+            "add_ip_address (uow)",
+            counters,
+            uow_ips,
+            lambda ip: service.add_ip_address(IPAddressCreate(ip=ip, ttl=1)),
+        )
+
+        await archive(baseline_ips + uow_ips)
+        results["reblacklist per call"] = await measure(
+            "reblacklist_ip (per call)", counters, baseline_ips, reblacklist_per_call,
+        )
+        results["reblacklist uow"] = await measure(
+            "reblacklist_ip (uow)",
+            counters,
+            uow_ips,
+            lambda ip: service.reblacklist_ip(ip=ip, reason="benchmark"),
+        )
+    finally:
+        for ip in baseline_ips + uow_ips:
+            await ip_adapter.delete_ip(ip=ip)
+        await db_manager.close()
+
+    return results["add uow"] <= 1 and results["reblacklist uow"] <= 1
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    if not asyncio.run(run(args.requests)):
+        print("FAIL: a unit of work used more than one connection checkout")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
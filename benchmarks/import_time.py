@@ -0,0 +1,71 @@
+"""Import-time profile of the application entry point.
+
+Runs `python -X importtime -c "import main"` in a fresh interpreter, prints
+the slowest modules by cumulative time and exits non-zero when the total
+exceeds the budget, e.g.:
+
+    python -m benchmarks.import_time --budget-ms 1000 --top 15
+"""
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Modules that must never be imported by a worker at startup.
+FORBIDDEN_MODULES = ("alembic",)
+
+
+def profile_imports(target: str) -> list[tuple[str, int, int]]:
+    env = {**os.environ, "PYTHONPATH": str(ROOT)}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        capture_output=True,
+        text=True,
+        env=env,
+        cwd=ROOT,
+        check=True,
+    )
+
+    entries: list[tuple[str, int, int]] = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|")
+        entries.append((module.strip(), int(self_us), int(cumulative_us)))
+
+    return entries
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--target", default="main")
+    parser.add_argument("--budget-ms", type=float, default=1000.0)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    entries = profile_imports(args.target)
+    total_ms = sum(self_us for _, self_us, _ in entries) / 1000
+
+    for module, _, cumulative_us in sorted(entries, key=lambda e: -e[2])[: args.top]:
+        print(f"{cumulative_us / 1000:10.1f} ms  {module}")
+    print(f"{total_ms:10.1f} ms  total (budget {args.budget_ms:.0f} ms)")
+
+    failed = False
+    loaded = {module for module, _, _ in entries}
+    for forbidden in FORBIDDEN_MODULES:
+        if forbidden in loaded:
+            print(f"FAIL: {forbidden!r} is imported at startup")
+            failed = True
+
+    if total_ms > args.budget_ms:
+        print("FAIL: import time over budget")
+        failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,183 @@
+"""Request throughput of `python -m src.cli.serve` against the previous
+bare `uvicorn main:app` command.
+
+Starts each command on a free local port, waits until it answers
+/health/live, then drives every --path with keep-alive connections from
+several client processes for --duration seconds and prints requests/s and
+latency percentiles per command:
+
+    python -m benchmarks.serve_throughput --path /ip/blacklist --duration 20
+
+Both commands use the database settings from the environment; the serve
+entry point is started with --no-wait-db so only request handling is
+compared.
+"""
+import argparse
+import asyncio
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor
+
+COMMANDS = {
+    "uvicorn main:app": [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1"],
+    "src.cli.serve": [sys.executable, "-m", "src.cli.serve", "--host", "127.0.0.1", "--no-wait-db"],
+}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_live(port: int, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/health/live", timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise SystemExit(f"Server on port {port} not live after {timeout}s")
+
+
+async def _read_response(reader: asyncio.StreamReader) -> int:
+    head = await reader.readuntil(b"\r\n\r\n")
+    status = int(head.split(b" ", 2)[1])
+    headers = head.lower()
+
+    if b"transfer-encoding: chunked" in headers:
+        while True:
+            size = int((await reader.readuntil(b"\r\n")).split(b";")[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                return status
+
+    marker = headers.find(b"content-length:")
+    if marker >= 0:
+        length = int(headers[marker + 15 : headers.index(b"\r\n", marker)])
+        await reader.readexactly(length)
+    return status
+
+
+async def _connection(
+    port: int,
+    paths: list[str],
+    deadline: float,
+    latencies: list[float],
+) -> int:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    requests = [
+        f"GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\n\r\n".encode() for path in paths
+    ]
+    errors = 0
+
+    try:
+        i = 0
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            writer.write(requests[i % len(requests)])
+            status = await _read_response(reader)
+            latencies.append(time.perf_counter() - start)
+            errors += status >= 400
+            i += 1
+    finally:
+        writer.close()
+
+    return errors
+
+
+def _client(port: int, paths: list[str], connections: int, duration: float) -> tuple[list[float], int]:
+    async def run() -> tuple[list[float], int]:
+        latencies: list[float] = []
+        deadline = time.monotonic() + duration
+        errors = await asyncio.gather(
+            *(_connection(port, paths, deadline, latencies) for _ in range(connections))
+        )
+        return latencies, sum(errors)
+
+    return asyncio.run(run())
+
+
+def load(
+    port: int,
+    paths: list[str],
+    clients: int,
+    connections: int,
+    duration: float,
+) -> tuple[list[float], int]:
+    latencies: list[float] = []
+    errors = 0
+    with ProcessPoolExecutor(max_workers=clients) as pool:
+        futures = [
+            pool.submit(_client, port, paths, connections, duration)
+            for _ in range(clients)
+        ]
+        for future in futures:
+            client_latencies, client_errors = future.result()
+            latencies.extend(client_latencies)
+            errors += client_errors
+    return latencies, errors
+
+
+def measure(name: str, command: list[str], args: argparse.Namespace) -> float:
+    port = free_port()
+    server = subprocess.Popen(
+        [*command, "--port", str(port)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        env={**os.environ, "PYTHONPATH": os.getcwd()},
+    )
+
+    try:
+        wait_until_live(port, timeout=60)
+        load(port, args.path, args.clients, args.connections, args.warmup)
+        latencies, errors = load(
+            port, args.path, args.clients, args.connections, args.duration,
+        )
+    finally:
+        server.send_signal(signal.SIGTERM)
+        try:
+            server.wait(timeout=60)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+    latencies.sort()
+    rps = len(latencies) / args.duration
+    p50 = latencies[len(latencies) // 2] * 1000 if latencies else 0
+    p99 = latencies[int(len(latencies) * 0.99)] * 1000 if latencies else 0
+    print(
+        f"{name:<18} {rps:>10.0f} req/s  p50 {p50:>7.2f} ms  "
+        f"p99 {p99:>7.2f} ms  {errors} errors"
+    )
+    return rps
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--path",
+        action="append",
+        help="path to request, repeatable (default /health/live)",
+    )
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--warmup", type=float, default=2)
+    parser.add_argument("--clients", type=int, default=max((os.cpu_count() or 2) // 2, 1))
+    parser.add_argument("--connections", type=int, default=32, help="per client process")
+    args = parser.parse_args()
+    args.path = args.path or ["/health/live"]
+
+    results = {name: measure(name, command, args) for name, command in COMMANDS.items()}
+
+    baseline, serve = results["uvicorn main:app"], results["src.cli.serve"]
+    print(f"speedup: {serve / baseline if baseline else 0:.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
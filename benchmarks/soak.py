@@ -0,0 +1,418 @@
+"""Soak test: hours of mixed traffic while the server's memory is sampled.
+
+Drives a running instance with a weighted mix of feed reads (plain and
+filtered), bulk lookups, sighting reports, adds, history reads, short-lived
+stream subscriptions and readiness probes, and polls /internal/memory every
+--sample-interval. After --warmup, RSS and GC object counts must level off:
+the least-squares trend over the second half of the samples may grow by at
+most --max-growth per hour (relative to the mean), checked per worker pid.
+The run fails when no pid got enough samples to judge, or when more than
+--max-error-rate of the requests got a 5xx or no response:
+
+    SERVE_WORKERS=1 MEMORY_TRACING_ENABLED=true python -m src.cli.serve &
+    python -m benchmarks.soak --url http://127.0.0.1:8080 --duration 4h
+
+All IPs come from a fixed pool (--ip-pool) so the blacklist itself stops
+growing. When the server traces allocations, tracemalloc snapshots are
+taken after the warmup and at the end and the fastest growing allocation
+sites are printed; with several workers both snapshots must land on the
+same one, so run a single worker for that.
+"""
+import argparse
+import http.client
+import json
+import random
+import socket
+import statistics
+import struct
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Callable
+from urllib.parse import urlencode, urlsplit
+
+import settings
+from src.common.ip_validation import parse_ip
+
+DURATION_UNITS = {"s": 1, "m": 60, "h": 3600}
+
+
+@dataclass(slots=True)
+class Sample:
+    elapsed: float
+    pid: int
+    rss_bytes: int
+    objects: int
+    tasks: int
+
+
+def parse_duration(value: str) -> float:
+    unit = DURATION_UNITS.get(value[-1:])
+    return float(value[:-1]) * unit if unit else float(value)
+
+
+def public_ip_pool(size: int, seed: int) -> list[str]:
+    rng = random.Random(seed)
+    ips: set[str] = set()
+    while len(ips) < size:
+        ip = socket.inet_ntoa(struct.pack(">I", rng.getrandbits(32)))
+        try:
+            parse_ip(ip)
+        except ValueError:
+            continue
+        ips.add(ip)
+    return sorted(ips)
+
+
+class Client:
+    """One keep-alive connection; reconnects after errors."""
+
+    def __init__(self, host: str, port: int, token: str) -> None:
+        self._host = host
+        self._port = port
+        self._token = token
+        self._connection: http.client.HTTPConnection | None = None
+
+    def close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        body: bytes | None = None,
+        content_type: str = "application/json",
+        internal: bool = False,
+        stream: bool = False,
+    ) -> tuple[int, bytes]:
+        headers = {"Content-Type": content_type} if body is not None else {}
+        if internal:
+            headers["X-Internal-Token"] = self._token
+
+        # A kept-alive connection the server has closed meanwhile fails on
+        # first use; that's retried once on a fresh one.
+        reused = self._connection is not None
+        try:
+            return self._request(method, path, body, headers, stream)
+        except (OSError, http.client.HTTPException):
+            self.close()
+            if not reused:
+                return 0, b""
+
+        try:
+            return self._request(method, path, body, headers, stream)
+        except (OSError, http.client.HTTPException):
+            self.close()
+            return 0, b""
+
+    def _request(
+        self,
+        method: str,
+        path: str,
+        body: bytes | None,
+        headers: dict[str, str],
+        stream: bool,
+    ) -> tuple[int, bytes]:
+        if self._connection is None:
+            self._connection = http.client.HTTPConnection(self._host, self._port, timeout=30)
+
+        self._connection.request(method, path, body=body, headers=headers)
+        response = self._connection.getresponse()
+        if stream and response.status == 200:
+            # First event only, then drop the connection like a client
+            # that goes away.
+            lines: list[bytes] = []
+            while (line := response.readline()) not in (b"\n", b""):
+                lines.append(line)
+            self.close()
+            return response.status, b"".join(lines)
+        return response.status, response.read()
+
+
+class Traffic:
+    def __init__(self, ips: list[str], seed: int) -> None:
+        self._ips = ips
+        self._rng = random.Random(seed)
+        self._actions: list[tuple[str, Callable[[Client], int], int]] = [
+            ("feed", self.feed, 30),
+            ("feed_filtered", self.feed_filtered, 15),
+            ("lookup", self.lookup, 15),
+            ("report", self.report, 15),
+            ("add", self.add, 5),
+            ("history", self.history, 10),
+            ("stream", self.stream, 5),
+            ("ready", self.ready, 5),
+        ]
+
+    def pick(self) -> tuple[str, Callable[[Client], int]]:
+        name, action, _ = self._rng.choices(
+            self._actions, weights=[weight for *_, weight in self._actions],
+        )[0]
+        return name, action
+
+    def _sample_ips(self, count: int) -> list[str]:
+        return self._rng.sample(self._ips, min(count, len(self._ips)))
+
+    def feed(self, client: Client) -> int:
+        return client.request("GET", "/ip/blacklist")[0]
+
+    def feed_filtered(self, client: Client) -> int:
+        shard_count = self._rng.choice((2, 4, 16))
+        params: dict[str, Any] = self._rng.choice((
+            {"family": 4},
+            {"prefix": f"{self._rng.randrange(1, 224)}.0.0.0/8"},
+            {
+                "shard_count": shard_count,
+                "shard_index": self._rng.randrange(shard_count),
+                "shard_by": self._rng.choice(("range", "hash")),
+            },
+        ))
+        return client.request("GET", f"/ip/blacklist?{urlencode(params)}")[0]
+
+    def lookup(self, client: Client) -> int:
+        body = "\n".join(self._sample_ips(100)).encode()
+        return client.request("POST", "/ip/lookup", body, content_type="text/plain")[0]
+
+    def report(self, client: Client) -> int:
+        body = json.dumps({"ips": self._sample_ips(10)}).encode()
+        return client.request("POST", "/ip/report", body)[0]
+
+    def add(self, client: Client) -> int:
+        body = json.dumps({"ip": self._rng.choice(self._ips), "ttl": 1}).encode()
+        return client.request("POST", "/ip/add", body)[0]
+
+    def history(self, client: Client) -> int:
+        query = urlencode({"ip": self._rng.choice(self._ips), "limit": 20})
+        return client.request("GET", f"/internal/ip-history?{query}", internal=True)[0]
+
+    def stream(self, client: Client) -> int:
+        return client.request("GET", "/ip/blacklist/stream", stream=True)[0]
+
+    def ready(self, client: Client) -> int:
+        return client.request("GET", "/health/ready")[0]
+
+
+class Soak:
+    def __init__(self, args: argparse.Namespace) -> None:
+        url = urlsplit(args.url)
+        self._host = url.hostname or "127.0.0.1"
+        self._port = url.port or 80
+        self._token = args.token
+        self._args = args
+        self._ips = public_ip_pool(args.ip_pool, args.seed)
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.statuses: Counter[tuple[str, int]] = Counter()
+        self.samples: list[Sample] = []
+
+    def _client(self) -> Client:
+        return Client(self._host, self._port, self._token)
+
+    def _drive(self, seed: int) -> None:
+        traffic = Traffic(self._ips, seed)
+        client = self._client()
+        statuses: Counter[tuple[str, int]] = Counter()
+        requests = 0
+
+        while not self._stop.is_set():
+            name, action = traffic.pick()
+            statuses[(name, action(client))] += 1
+            requests += 1
+            if requests % 100 == 0:
+                with self._lock:
+                    self.requests += requests
+                    self.statuses.update(statuses)
+                requests = 0
+                statuses.clear()
+
+        client.close()
+        with self._lock:
+            self.requests += requests
+            self.statuses.update(statuses)
+
+    def internal(self, method: str, path: str) -> Any:  # noqa: ANN401
+        client = self._client()
+        try:
+            status, body = client.request(method, f"/internal{path}", internal=True)
+        finally:
+            client.close()
+        return json.loads(body) if status == 200 else None
+
+    def _sample(self, start: float, last_requests: int, last_at: float) -> tuple[int, float]:
+        stats = self.internal("GET", "/memory")
+        now = time.monotonic()
+        with self._lock:
+            requests = self.requests
+        rate = (requests - last_requests) / (now - last_at) if now > last_at else 0
+
+        if stats is None:
+            print(f"{now - start:>8.0f}s  /internal/memory unavailable", file=sys.stderr)
+            return requests, now
+
+        sample = Sample(
+            elapsed=now - start,
+            pid=stats["pid"],
+            rss_bytes=stats["rss_bytes"],
+            objects=stats["objects"],
+            tasks=stats["tasks"],
+        )
+        self.samples.append(sample)
+        print(
+            f"{sample.elapsed:>8.0f}s  pid {sample.pid:<7} "
+            f"rss {sample.rss_bytes / 2**20:>8.1f} MB  objects {sample.objects:>9}  "
+            f"tasks {sample.tasks:>5}  {rate:>8.0f} req/s",
+            file=sys.stderr,
+        )
+        return requests, now
+
+    def run(self) -> None:
+        threads = [
+            threading.Thread(target=self._drive, args=(self._args.seed + i,), daemon=True)
+            for i in range(self._args.concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+
+        start = last_at = time.monotonic()
+        last_requests = 0
+        warmup_snapshot: int | None = None
+        deadline = start + self._args.duration
+
+        try:
+            while not self._stop.wait(
+                max(0.0, min(self._args.sample_interval, deadline - time.monotonic())),
+            ):
+                last_requests, last_at = self._sample(start, last_requests, last_at)
+                if warmup_snapshot is None and last_at - start >= self._args.warmup:
+                    warmup_snapshot = self._snapshot()
+                if time.monotonic() >= deadline:
+                    break
+        finally:
+            self._stop.set()
+            for thread in threads:
+                thread.join()
+
+        if warmup_snapshot is not None:
+            self._print_growth(warmup_snapshot)
+
+    def _snapshot(self) -> int | None:
+        snapshot = self.internal("POST", "/memory/snapshots")
+        return snapshot["id"] if snapshot else None
+
+    def _print_growth(self, base: int) -> None:
+        end = self._snapshot()
+        diff = end and self.internal(
+            "GET", f"/memory/snapshots/{end}/diff?{urlencode({'base': base, 'limit': 15})}",
+        )
+        if not diff:
+            print("No tracemalloc diff (tracing off or another worker answered)")
+            return
+
+        print("Top growing allocation sites since warmup:")
+        for stat in diff:
+            print(
+                f"  {stat['size_diff'] / 1024:>+10.1f} KiB  "
+                f"{stat['count_diff']:>+8} blocks  {stat['location']}"
+            )
+
+
+def growth_per_hour(samples: list[Sample], field: str) -> float:
+    """Relative growth per hour of the least-squares trend of `field`."""
+    times = [sample.elapsed for sample in samples]
+    values = [getattr(sample, field) for sample in samples]
+    slope, _ = statistics.linear_regression(times, values)
+    return slope * 3600 / statistics.fmean(values)
+
+
+def check(samples: list[Sample], warmup: float, max_growth: float) -> bool:
+    """True when every judged pid levelled off; False if none could be
+    judged at all."""
+    ok = True
+    judged = 0
+    for pid in sorted({sample.pid for sample in samples}):
+        steady = [s for s in samples if s.pid == pid and s.elapsed >= warmup]
+        tail = steady[len(steady) // 2 :]
+        if len(tail) < 3:
+            print(f"pid {pid}: {len(tail)} steady samples, not enough to judge")
+            continue
+
+        judged += 1
+        rss = growth_per_hour(tail, "rss_bytes")
+        objects = growth_per_hour(tail, "objects")
+        leveled = rss <= max_growth and objects <= max_growth
+        ok &= leveled
+        print(
+            f"pid {pid}: rss {tail[-1].rss_bytes / 2**20:.1f} MB "
+            f"({rss:+.2%}/h), objects {tail[-1].objects} ({objects:+.2%}/h), "
+            f"max tasks {max(s.tasks for s in tail)}: "
+            f"{'levelled off' if leveled else 'STILL GROWING'}"
+        )
+
+    if not judged:
+        print("No worker had enough steady samples; lengthen --duration")
+        return False
+    return ok
+
+
+def error_rate(statuses: Counter[tuple[str, int]]) -> float:
+    """Share of requests that failed on the client side (status 0) or with
+    a 5xx; memory that levels off under failing traffic proves little."""
+    total = sum(statuses.values())
+    errors = sum(
+        count for (_, status), count in statuses.items()
+        if status == 0 or status >= 500
+    )
+    return errors / total if total else 1.0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default=f"http://127.0.0.1:{settings.EXTERNAL_PORT}")
+    parser.add_argument("--token", default=settings.INTERNAL_API_TOKEN)
+    parser.add_argument("--duration", type=parse_duration, default="1h", help="e.g. 4h, 30m")
+    parser.add_argument("--warmup", type=parse_duration, default="5m")
+    parser.add_argument("--sample-interval", type=parse_duration, default="30s")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--ip-pool", type=int, default=5_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--max-growth",
+        type=float,
+        default=0.02,
+        help="allowed RSS/object trend per hour after warmup, relative",
+    )
+    parser.add_argument(
+        "--max-error-rate",
+        type=float,
+        default=0.01,
+        help="allowed share of connection errors and 5xx responses",
+    )
+    args = parser.parse_args()
+
+    soak = Soak(args)
+    soak.run()
+
+    print(f"{soak.requests} requests")
+    for (name, status), count in sorted(soak.statuses.items()):
+        print(f"  {name:<14} {status or 'error':>5}  {count}")
+
+    errors = error_rate(soak.statuses)
+    print(f"{errors:.2%} errors")
+
+    ok = True
+    if errors > args.max_error_rate:
+        print(f"FAIL: error rate above {args.max_error_rate:.2%}")
+        ok = False
+    if not check(soak.samples, args.warmup, args.max_growth):
+        print("FAIL: memory kept growing after warmup, or couldn't be judged")
+        ok = False
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,23 +1,115 @@
+import asyncio
 import logging
 from contextlib import asynccontextmanager
+from functools import partial
 from typing import Any, AsyncGenerator
 
 from fastapi import FastAPI
 
+import settings
+from src.adapters.adapters_manager import AdaptersManager
+from src.api.middlewares import AdmissionControlMiddleware, ProfilingMiddleware
 from src.api.router import api_router
+from src.bl.background_tasks.cleanup_task import run_cleanup
+from src.bl.background_tasks.periodic import run_periodically
+from src.bl.bl_manager import BLManager
+from src.common.dependencies import setup_db_manager, shutdown_db_manager
+from src.common.health import health_monitor
+from src.common.memory import memory_profiler
+from src.db.managers.db_manager import DBManager
 
 logger = logging.getLogger(__name__)
 
+
+async def warmup(db_manager: DBManager) -> None:
+    try:
+        await db_manager.warmup(connections=settings.DB_WARMUP_CONNECTIONS)
+    except Exception:
+        # Not fatal: readiness keeps reporting the DB as down until it's back.
+        logger.exception("Warmup failed")
+
+    await health_monitor.readiness(db_manager)
+
+
+def start_background_tasks(
+    db_manager: DBManager,
+    bl_manager: BLManager,
+) -> list[asyncio.Task[None]]:
+    return [
+        asyncio.create_task(warmup(db_manager)),
+        asyncio.create_task(bl_manager.ip_service.follow_blacklist_changes()),
+        asyncio.create_task(
+            run_periodically(
+                name="partition_maintenance",
+                interval=settings.PARTITION_MAINTENANCE_INTERVAL,
+                func=partial(run_cleanup, bl_manager),
+            ),
+        ),
+        asyncio.create_task(
+            run_periodically(
+                name="sighting_flush",
+                interval=settings.SIGHTING_FLUSH_INTERVAL,
+                func=bl_manager.ip_service.flush_sightings,
+            ),
+        ),
+        asyncio.create_task(
+            run_periodically(
+                name="blacklist_expiry",
+                interval=settings.BLACKLIST_EXPIRY_TICK,
+                func=bl_manager.ip_service.expire_blacklist,
+            ),
+        ),
+        asyncio.create_task(
+            run_periodically(
+                name="blacklist_snapshot_persist",
+                interval=settings.BLACKLIST_SNAPSHOT_PERSIST_INTERVAL,
+                func=bl_manager.ip_service.persist_blacklist_snapshot,
+            ),
+        ),
+    ]
+
+
+async def stop_background_tasks(tasks: list[asyncio.Task[None]]) -> None:
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
 @asynccontextmanager
 async def lifespan(app_: FastAPI) -> AsyncGenerator[None, Any]:
     logger.info("Starting up...")
+    if settings.MEMORY_TRACING_ENABLED:
+        memory_profiler.start()
+    db_manager = await setup_db_manager()
+    bl_manager = BLManager(AdaptersManager(db_manager=db_manager))
+
+    # Serve the last persisted feed right away; the DB warmup and the first
+    # load run in the background so a degraded DB can't hold up startup.
+    await bl_manager.ip_service.restore_blacklist_snapshot()
+    background_tasks = start_background_tasks(db_manager, bl_manager)
     yield
     logger.info("Shutting down...")
+    await stop_background_tasks(background_tasks)
+
+    try:
+        await bl_manager.ip_service.flush_sightings()
+    except Exception:
+        logger.exception("Final sightings flush failed")
+
+    await bl_manager.ip_service.persist_blacklist_snapshot()
+
+    await shutdown_db_manager()
 
 app = FastAPI(lifespan=lifespan)
 
 app.include_router(api_router)
 
+if settings.PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+
+if settings.ADMISSION_CONTROL_ENABLED:
+    app.add_middleware(AdmissionControlMiddleware)
+
 @app.get('/')
 async def root() -> dict[str, Any]:
     return {'message': 'IP Blacklist Service'}
@@ -0,0 +1,160 @@
+"""Partition ip_address by expires_at
+
+Revision ID: 2
+Revises: 1
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from datetime import datetime, timedelta
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '2'
+down_revision: Union[str, Sequence[str], None] = '1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Weeks of partitions created up front; covers the max TTL (365 days) plus
+# the default cooling period. The app keeps extending this horizon.
+WEEKS_AHEAD = 58
+
+
+def _week_start(moment: datetime) -> datetime:
+    day = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    return day - timedelta(days=day.weekday())
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("ALTER TABLE ip_address RENAME TO ip_address_old")
+    op.execute("ALTER TABLE ip_address_old RENAME CONSTRAINT uq_ip TO uq_ip_old")
+    op.execute(
+        "ALTER TABLE ip_address_old RENAME CONSTRAINT ip_address_pkey "
+        "TO ip_address_old_pkey"
+    )
+    op.execute("ALTER INDEX ix_ip_gist RENAME TO ix_ip_gist_old")
+
+    # The partition key has to be part of the primary key, hence NOT NULL;
+    # 'infinity' stands for "never expires" and lives in the default partition.
+    op.execute(
+        """
+        CREATE TABLE ip_address (
+            id UUID NOT NULL DEFAULT gen_random_uuid(),
+            ip INET NOT NULL,
+            status VARCHAR NOT NULL,
+            description TEXT,
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT now(),
+            updated_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT now(),
+            last_blacklist_at TIMESTAMP WITHOUT TIME ZONE,
+            expires_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT 'infinity',
+            CONSTRAINT ip_address_pkey PRIMARY KEY (id, expires_at)
+        ) PARTITION BY RANGE (expires_at)
+        """
+    )
+    op.create_index('ix_ip_gist', 'ip_address', ['ip'], unique=False, postgresql_using='gist', postgresql_ops={'ip': 'inet_ops'})
+    op.create_index('ix_ip_address_ip', 'ip_address', ['ip'], unique=False)
+
+    # A unique index on a partitioned table must include the partition key,
+    # so uniqueness of `ip` across partitions is enforced by a trigger that
+    # serializes writers of the same address on an advisory lock.
+    op.execute(
+        """
+        CREATE FUNCTION ip_address_enforce_unique_ip() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_advisory_xact_lock(hashtextextended(host(NEW.ip), 0));
+            IF EXISTS (
+                SELECT 1 FROM ip_address WHERE ip = NEW.ip AND id <> NEW.id
+            ) THEN
+                RAISE unique_violation USING
+                    MESSAGE = format('duplicate ip %s', NEW.ip),
+                    CONSTRAINT = 'uq_ip';
+            END IF;
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER ip_address_unique_ip
+        BEFORE INSERT OR UPDATE OF ip ON ip_address
+        FOR EACH ROW EXECUTE FUNCTION ip_address_enforce_unique_ip()
+        """
+    )
+
+    op.execute("CREATE TABLE ip_address_default PARTITION OF ip_address DEFAULT")
+
+    first_expiry = op.get_bind().scalar(
+        sa.text("SELECT min(expires_at) FROM ip_address_old")
+    )
+    last_expiry = op.get_bind().scalar(
+        sa.text("SELECT max(expires_at) FROM ip_address_old")
+    )
+
+    now = datetime.now()
+    lower = _week_start(min(first_expiry or now, now))
+    horizon = max(last_expiry or now, now + timedelta(weeks=WEEKS_AHEAD))
+    while lower <= horizon:
+        upper = lower + timedelta(weeks=1)
+        op.execute(
+            f"CREATE TABLE ip_address_p{lower:%Y%m%d} PARTITION OF ip_address "
+            f"FOR VALUES FROM ('{lower.isoformat()}') TO ('{upper.isoformat()}')"
+        )
+        lower = upper
+
+    op.execute(
+        """
+        INSERT INTO ip_address (
+            id, ip, status, description, created_at, updated_at,
+            last_blacklist_at, expires_at
+        )
+        SELECT
+            id, ip, status, description, created_at, updated_at,
+            last_blacklist_at, COALESCE(expires_at, 'infinity')
+        FROM ip_address_old
+        """
+    )
+    op.drop_table('ip_address_old')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("ALTER TABLE ip_address RENAME TO ip_address_partitioned")
+    op.execute("ALTER INDEX ix_ip_gist RENAME TO ix_ip_gist_partitioned")
+    op.execute(
+        "ALTER TABLE ip_address_partitioned RENAME CONSTRAINT ip_address_pkey "
+        "TO ip_address_partitioned_pkey"
+    )
+
+    op.create_table('ip_address',
+    sa.Column('id', sa.UUID(as_uuid=False), server_default=sa.text('gen_random_uuid()'), nullable=False),
+    sa.Column('ip', postgresql.INET(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('last_blacklist_at', sa.DateTime(), nullable=True),
+    sa.Column('expires_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('ip', name='uq_ip')
+    )
+    op.create_index('ix_ip_gist', 'ip_address', ['ip'], unique=False, postgresql_using='gist', postgresql_ops={'ip': 'inet_ops'})
+
+    op.execute(
+        """
+        INSERT INTO ip_address (
+            id, ip, status, description, created_at, updated_at,
+            last_blacklist_at, expires_at
+        )
+        SELECT
+            id, ip, status, description, created_at, updated_at,
+            last_blacklist_at, NULLIF(expires_at, 'infinity')
+        FROM ip_address_partitioned
+        """
+    )
+    op.execute("DROP TABLE ip_address_partitioned CASCADE")
+    op.execute("DROP FUNCTION ip_address_enforce_unique_ip()")
@@ -0,0 +1,29 @@
+"""Add sighting counters to ip_address
+
+Revision ID: 3
+Revises: 2
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '3'
+down_revision: Union[str, Sequence[str], None] = '2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('ip_address', sa.Column('hit_count', sa.Integer(), server_default=sa.text('0'), nullable=False))
+    op.add_column('ip_address', sa.Column('last_seen_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('ip_address', 'last_seen_at')
+    op.drop_column('ip_address', 'hit_count')
@@ -0,0 +1,102 @@
+"""Move re-blacklist history into ip_address_event
+
+Revision ID: 4
+Revises: 3
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '4'
+down_revision: Union[str, Sequence[str], None] = '3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+HISTORY_PREFIX = "Re-blacklisted at "
+HISTORY_SEPARATOR = "\nPrevious description: "
+
+
+def _split_history(
+    description: str,
+) -> tuple[list[tuple[datetime, str | None]], str | None]:
+    """Unwind the "Re-blacklisted at <date>: <reason>\\nPrevious description:
+    ..." chain reblacklist_ip used to build into (date, reason) entries plus
+    the original description."""
+    entries: list[tuple[datetime, str | None]] = []
+    remaining: str | None = description
+
+    while remaining is not None and remaining.startswith(HISTORY_PREFIX):
+        head, separator, rest = remaining.partition(HISTORY_SEPARATOR)
+        date, _, reason = head[len(HISTORY_PREFIX):].partition(": ")
+        try:
+            created_at = datetime.fromisoformat(date)
+        except ValueError:
+            break
+        entries.append((created_at, None if reason == "None" else reason))
+        remaining = rest if separator else None
+
+    if remaining == "None":
+        remaining = None
+
+    return entries, remaining
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('ip_address_event',
+    sa.Column('id', sa.BigInteger(), sa.Identity(always=True), nullable=False),
+    sa.Column('ip', postgresql.INET(), nullable=False),
+    sa.Column('event', sa.String(), nullable=False),
+    sa.Column('reason', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_ip_address_event_ip_id', 'ip_address_event', ['ip', sa.text('id DESC')], unique=False)
+
+    connection = op.get_bind()
+    rows = connection.execute(
+        sa.text(
+            "SELECT id, host(ip), description FROM ip_address "
+            "WHERE description LIKE :prefix"
+        ),
+        {"prefix": f"{HISTORY_PREFIX}%"},
+    ).all()
+
+    events: list[dict[str, object]] = []
+    descriptions: list[dict[str, object]] = []
+    for row_id, ip, description in rows:
+        entries, original = _split_history(description)
+        if not entries:
+            continue
+        # Oldest first, so event ids follow the original order.
+        for created_at, reason in reversed(entries):
+            events.append(
+                {"ip": ip, "event": "REBLACKLISTED", "reason": reason, "created_at": created_at}
+            )
+        descriptions.append({"id": row_id, "description": original})
+
+    if events:
+        connection.execute(
+            sa.text(
+                "INSERT INTO ip_address_event (ip, event, reason, created_at) "
+                "VALUES (CAST(:ip AS inet), :event, :reason, :created_at)"
+            ),
+            events,
+        )
+        connection.execute(
+            sa.text("UPDATE ip_address SET description = :description WHERE id = :id"),
+            descriptions,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # The history isn't folded back into ip_address.description.
+    op.drop_index('ix_ip_address_event_ip_id', table_name='ip_address_event')
+    op.drop_table('ip_address_event')
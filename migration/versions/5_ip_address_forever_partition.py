@@ -0,0 +1,42 @@
+"""Give non-expiring ip_address rows their own partition
+
+Revision ID: 5
+Revises: 4
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '5'
+down_revision: Union[str, Sequence[str], None] = '4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 'infinity' rows used to live in the default partition, which every
+    # new weekly partition has to scan (under an ACCESS EXCLUSIVE lock)
+    # when it's attached. With them moved out, the default only holds rows
+    # past the pre-created horizon.
+    op.execute("ALTER TABLE ip_address DETACH PARTITION ip_address_default")
+    op.execute(
+        "CREATE TABLE ip_address_forever PARTITION OF ip_address "
+        "FOR VALUES FROM ('infinity') TO (MAXVALUE)"
+    )
+    op.execute(
+        "WITH moved AS (DELETE FROM ip_address_default "
+        "WHERE expires_at = 'infinity' RETURNING *) "
+        "INSERT INTO ip_address SELECT * FROM moved"
+    )
+    op.execute("ALTER TABLE ip_address ATTACH PARTITION ip_address_default DEFAULT")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("ALTER TABLE ip_address DETACH PARTITION ip_address_forever")
+    op.execute("INSERT INTO ip_address SELECT * FROM ip_address_forever")
+    op.execute("DROP TABLE ip_address_forever")
@@ -0,0 +1,41 @@
+"""Record expires_at on ip_address_event instead of EXPIRED rows
+
+Revision ID: 6
+Revises: 5
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '6'
+down_revision: Union[str, Sequence[str], None] = '5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'ip_address_event',
+        sa.Column('expires_at', sa.DateTime(), nullable=True),
+    )
+    # Expiries are inferred from the latest ADDED/REBLACKLISTED event of
+    # an IP from now on; backfill it for the rows that are still live.
+    # Older history keeps the EXPIRED rows it already has.
+    op.execute(
+        "UPDATE ip_address_event e SET expires_at = a.expires_at "
+        "FROM ip_address a "
+        "WHERE e.ip = a.ip AND e.id = ("
+        "SELECT max(l.id) FROM ip_address_event l "
+        "WHERE l.ip = a.ip AND l.event IN ('ADDED', 'REBLACKLISTED'))"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Expiries inferred after the upgrade aren't written back as rows.
+    op.drop_column('ip_address_event', 'expires_at')
@@ -0,0 +1,88 @@
+"""Announce blacklist membership changes of ip_address rows
+
+Revision ID: 7
+Revises: 6
+Create Date: 2026-10-19 22:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '7'
+down_revision: Union[str, Sequence[str], None] = '6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Every process keeps the blacklist in memory and applies these instead
+    # of reloading it. Notifications go out at commit, in commit order, and
+    # only for rows entering, leaving or moving within the blacklist;
+    # hit_count bumps don't notify. A row moved to another partition fires
+    # the DELETE then the INSERT trigger, i.e. remove then add.
+    #
+    # Partition maintenance moves rows between partitions with
+    # `SET LOCAL ip_address.notify = 'off'`; those aren't changes.
+    op.execute(
+        """
+        CREATE FUNCTION ip_address_notify_blacklist() RETURNS trigger AS $$
+        DECLARE
+            was_listed boolean := false;
+            is_listed boolean := false;
+        BEGIN
+            IF current_setting('ip_address.notify', true) = 'off' THEN
+                RETURN NULL;
+            END IF;
+
+            IF TG_OP <> 'INSERT' THEN
+                was_listed := OLD.status = 'BLACKLISTED';
+            END IF;
+            IF TG_OP <> 'DELETE' THEN
+                is_listed := NEW.status = 'BLACKLISTED';
+            END IF;
+
+            IF was_listed AND NOT (is_listed AND NEW.ip = OLD.ip) THEN
+                PERFORM pg_notify(
+                    'ip_address_blacklist',
+                    json_build_object('op', 'remove', 'ip', host(OLD.ip))::text
+                );
+            END IF;
+
+            IF is_listed AND NOT (
+                was_listed
+                AND NEW.ip = OLD.ip
+                AND NEW.expires_at = OLD.expires_at
+                AND NEW.last_blacklist_at IS NOT DISTINCT FROM OLD.last_blacklist_at
+            ) THEN
+                PERFORM pg_notify(
+                    'ip_address_blacklist',
+                    json_build_object(
+                        'op', 'add',
+                        'ip', host(NEW.ip),
+                        'expires_at', NEW.expires_at
+                    )::text
+                );
+            END IF;
+
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER ip_address_notify_blacklist
+        AFTER INSERT OR DELETE OR UPDATE OF ip, status, expires_at, last_blacklist_at
+        ON ip_address
+        FOR EACH ROW EXECUTE FUNCTION ip_address_notify_blacklist()
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER ip_address_notify_blacklist ON ip_address")
+    op.execute("DROP FUNCTION ip_address_notify_blacklist()")
@@ -1,4 +1,6 @@
+from functools import lru_cache
 from os import getenv
+from typing import Any
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -9,9 +11,21 @@ INTERNAL_API_TOKEN = getenv("INTERNAL_API_TOKEN", "very_secret_api_token")
 
 PYTEST = bool(getenv("PYTEST", False))
 
+# `python -m src.cli.serve`; 0 workers means one per available CPU.
+# /internal state is per worker, see src/cli/serve.py.
+SERVE_WORKERS = int(getenv("SERVE_WORKERS", 0))
+SERVE_BACKLOG = int(getenv("SERVE_BACKLOG", 2048))
+SERVE_KEEPALIVE = int(getenv("SERVE_KEEPALIVE", 30))  # in seconds
+SERVE_LIMIT_CONCURRENCY = int(getenv("SERVE_LIMIT_CONCURRENCY", 0))  # per worker, 0 = off
+SERVE_GRACEFUL_TIMEOUT = int(getenv("SERVE_GRACEFUL_TIMEOUT", 30))  # in seconds
+SERVE_WORKER_READY_TIMEOUT = float(getenv("SERVE_WORKER_READY_TIMEOUT", 60))  # in seconds
+SERVE_DB_WAIT_TIMEOUT = float(getenv("SERVE_DB_WAIT_TIMEOUT", 60))  # in seconds
+SERVE_ACCESS_LOG = getenv("SERVE_ACCESS_LOG", "false").lower() == "true"
+
 DBMS = getenv("DBMS", "postgresql")
 DB_DRIVER = getenv("DB_DRIVER", "asyncpg")
 DB_MAX_CONNECTIONS = int(getenv("DB_MAX_CONNECTIONS", "5"))
+DB_MAX_OVERFLOW = int(getenv("DB_MAX_OVERFLOW", "10"))
 
 
 class DatabaseSettings(BaseSettings):
@@ -27,8 +41,88 @@ class DatabaseSettings(BaseSettings):
 
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
-DB_SETTINGS = DatabaseSettings()  # type: ignore
-DATABASE_URL = DB_SETTINGS.database_url
+
+@lru_cache(maxsize=1)
+def get_database_settings() -> DatabaseSettings:
+    return DatabaseSettings()  # type: ignore
+
+
+def __getattr__(name: str) -> Any:  # noqa: ANN401
+    # DB settings are resolved on first use instead of at import time so
+    # importing the app (and tooling that never touches the DB) stays cheap.
+    if name == "DB_SETTINGS":
+        return get_database_settings()
+    if name == "DATABASE_URL":
+        return get_database_settings().database_url
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 IP_COOLING_PERIOD = int(getenv("IP_COOLING_PERIOD", 30))  # in days
 REPEATED_BLACKLIST_IP_TTL = int(getenv("REPEATED_BLACKLIST_IP_TTL", 30))  # in days
+
+# Weekly ip_address partitions are pre-created this far ahead; the default
+# covers the max TTL (365 days) plus the cooling period.
+PARTITION_WEEKS_AHEAD = int(
+    getenv("PARTITION_WEEKS_AHEAD", -(-(365 + IP_COOLING_PERIOD) // 7) + 1),
+)
+PARTITION_MAINTENANCE_INTERVAL = float(
+    getenv("PARTITION_MAINTENANCE_INTERVAL", 3600),
+)  # in seconds
+# How long partition DDL may queue for its lock before the run gives up.
+PARTITION_DDL_LOCK_TIMEOUT = float(getenv("PARTITION_DDL_LOCK_TIMEOUT", 2))  # in seconds
+# ip_address_event rows older than this are purged by the maintenance run.
+IP_EVENT_RETENTION = int(getenv("IP_EVENT_RETENTION", 730))  # in days
+IP_EVENT_PURGE_BATCH = int(getenv("IP_EVENT_PURGE_BATCH", 10_000))
+
+HEALTHCHECK_CACHE_TTL = float(getenv("HEALTHCHECK_CACHE_TTL", 2))  # in seconds
+HEALTHCHECK_TIMEOUT = float(getenv("HEALTHCHECK_TIMEOUT", 1))  # in seconds
+DB_WARMUP_CONNECTIONS = int(getenv("DB_WARMUP_CONNECTIONS", DB_MAX_CONNECTIONS))
+
+PROFILING_ENABLED = getenv("PROFILING_ENABLED", "false").lower() == "true"
+PROFILE_SAMPLE_RATE = float(getenv("PROFILE_SAMPLE_RATE", 0))  # share of requests
+PROFILE_INTERVAL = float(getenv("PROFILE_INTERVAL", 0.005))  # in seconds
+PROFILE_RING_SIZE = int(getenv("PROFILE_RING_SIZE", 32))
+
+# tracemalloc slows allocations down noticeably; off unless asked for.
+MEMORY_TRACING_ENABLED = getenv("MEMORY_TRACING_ENABLED", "false").lower() == "true"
+MEMORY_TRACE_FRAMES = int(getenv("MEMORY_TRACE_FRAMES", 1))
+MEMORY_SNAPSHOT_RING_SIZE = int(getenv("MEMORY_SNAPSHOT_RING_SIZE", 8))
+
+SQL_TRACING_ENABLED = getenv("SQL_TRACING_ENABLED", "true").lower() == "true"
+SQL_SLOW_QUERY_MS = float(getenv("SQL_SLOW_QUERY_MS", 200))
+SQL_TRACE_MAX_STATEMENTS = int(getenv("SQL_TRACE_MAX_STATEMENTS", 500))
+
+ADMISSION_CONTROL_ENABLED = getenv("ADMISSION_CONTROL_ENABLED", "true").lower() == "true"
+ADMISSION_READ_CONCURRENCY = int(getenv("ADMISSION_READ_CONCURRENCY", 8))
+ADMISSION_READ_QUEUE = int(getenv("ADMISSION_READ_QUEUE", 200))
+ADMISSION_READ_MAX_WAIT = float(getenv("ADMISSION_READ_MAX_WAIT", 1))  # in seconds
+ADMISSION_WRITE_CONCURRENCY = int(getenv("ADMISSION_WRITE_CONCURRENCY", 4))
+ADMISSION_WRITE_QUEUE = int(getenv("ADMISSION_WRITE_QUEUE", 100))
+ADMISSION_WRITE_MAX_WAIT = float(getenv("ADMISSION_WRITE_MAX_WAIT", 2))  # in seconds
+ADMISSION_INTERNAL_CONCURRENCY = int(getenv("ADMISSION_INTERNAL_CONCURRENCY", 2))
+ADMISSION_INTERNAL_QUEUE = int(getenv("ADMISSION_INTERNAL_QUEUE", 20))
+ADMISSION_INTERNAL_MAX_WAIT = float(getenv("ADMISSION_INTERNAL_MAX_WAIT", 5))  # in seconds
+
+SIGHTING_FLUSH_INTERVAL = float(getenv("SIGHTING_FLUSH_INTERVAL", 5))  # in seconds
+SIGHTING_MAX_PENDING_IPS = int(getenv("SIGHTING_MAX_PENDING_IPS", 100_000))
+SIGHTING_PROMOTE_THRESHOLD = int(getenv("SIGHTING_PROMOTE_THRESHOLD", 100))
+
+# The in-memory blacklist follows DB changes over LISTEN; it's reloaded in
+# full only when that connection is (re)established, retried this often.
+BLACKLIST_RECONCILE_RETRY_INTERVAL = float(
+    getenv("BLACKLIST_RECONCILE_RETRY_INTERVAL", 5),
+)  # in seconds
+BLACKLIST_LISTEN_KEEPALIVE = float(
+    getenv("BLACKLIST_LISTEN_KEEPALIVE", 30),
+)  # in seconds
+BLACKLIST_EXPIRY_TICK = float(getenv("BLACKLIST_EXPIRY_TICK", 1))  # in seconds
+BLACKLIST_FEED_CACHE_SIZE = int(getenv("BLACKLIST_FEED_CACHE_SIZE", 256))
+BLACKLIST_STREAM_BUFFER = int(getenv("BLACKLIST_STREAM_BUFFER", 1_000))  # events per client
+BLACKLIST_STREAM_LOG_SIZE = int(getenv("BLACKLIST_STREAM_LOG_SIZE", 10_000))
+BLACKLIST_STREAM_HEARTBEAT = float(getenv("BLACKLIST_STREAM_HEARTBEAT", 15))  # in seconds
+BULK_LOOKUP_MAX_IPS = int(getenv("BULK_LOOKUP_MAX_IPS", 100_000))
+# Empty path disables on-disk snapshots.
+BLACKLIST_SNAPSHOT_PATH = getenv("BLACKLIST_SNAPSHOT_PATH", "/tmp/ip-blacklist.snapshot")
+BLACKLIST_SNAPSHOT_PERSIST_INTERVAL = float(
+    getenv("BLACKLIST_SNAPSHOT_PERSIST_INTERVAL", 30),
+)  # in seconds
@@ -1,9 +1,13 @@
+from sqlalchemy.ext.asyncio.session import _AsyncSessionContextManager  # type: ignore
+
+from src.adapters.helpers import AdapterSession
 from src.adapters.managers.ip_address_adapter import IPAddressAdapter
 from src.db.managers.db_manager import DBManager
 
 
 class AdaptersManager:
     def __init__(self, db_manager: DBManager) -> None:
+        self._db_manager = db_manager
         self._ip_address_adapter = IPAddressAdapter(
             db_manager=db_manager,
         )
@@ -11,3 +15,8 @@ class AdaptersManager:
     @property
     def ip_adapter(self) -> IPAddressAdapter:
         return self._ip_address_adapter
+
+    def unit_of_work(self) -> _AsyncSessionContextManager[AdapterSession]:
+        """One session and one transaction for several adapter calls; pass
+        it as `adapter_session`. Commits when the block exits cleanly."""
+        return self._db_manager.session()
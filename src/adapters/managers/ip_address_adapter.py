@@ -4,9 +4,11 @@ from datetime import datetime
 from sqlalchemy.ext.asyncio.session import _AsyncSessionContextManager  # type: ignore
 
 from src.adapters.helpers import AdapterSession
-from src.common.enums import IPStatus
+from src.common.enums import IPEventType, IPStatus
+from src.db.listener import NotificationListener
 from src.db.managers.db_manager import DBManager
-from src.db.models import IPAddress
+from src.db.managers.ip_address_manager import BlacklistChangeHandler
+from src.db.models import IPAddress, IPAddressEvent
 
 logger = logging.getLogger(__name__)
 
@@ -21,11 +23,13 @@ class IPAddressAdapter:
     async def get_ip_by_address(
         self,
         ip: str,
+        for_update: bool = False,
         adapter_session: AdapterSession | None = None,
     ) -> IPAddress | None:
         try:
             return await self._db_manager.ip_manager.get_ip_address(
                 ip=ip,
+                for_update=for_update,
                 current_session=adapter_session,
             )
         except Exception as e:
@@ -102,6 +106,26 @@ class IPAddressAdapter:
             logger.error(f"Error getting blacklisted IPs: {e}")
             raise
 
+    def listen_blacklist_changes(
+        self,
+        on_change: BlacklistChangeHandler,
+    ) -> NotificationListener:
+        return self._db_manager.ip_manager.listen_blacklist_changes(
+            on_change=on_change,
+        )
+
+    async def get_blacklist_entries(
+        self,
+        adapter_session: AdapterSession | None = None,
+    ) -> list[tuple[str, datetime]]:
+        try:
+            return await self._db_manager.ip_manager.get_blacklist_entries(
+                current_session=adapter_session,
+            )
+        except Exception as e:
+            logger.error(f"Error getting blacklist entries: {e}")
+            raise
+
     async def cleanup_expired(
         self,
         adapter_session: AdapterSession | None = None,
@@ -114,6 +138,77 @@ class IPAddressAdapter:
             logger.error(f"Error cleaning up expired IPs: {e}")
             raise
 
+    async def record_sightings(
+        self,
+        sightings: list[tuple[str, int, datetime]],
+        promote_threshold: int,
+        expires_at: datetime,
+        adapter_session: AdapterSession | None = None,
+    ) -> None:
+        try:
+            await self._db_manager.ip_manager.record_sightings(
+                sightings=sightings,
+                promote_threshold=promote_threshold,
+                expires_at=expires_at,
+                current_session=adapter_session,
+            )
+        except Exception as e:
+            logger.error(f"Error recording {len(sightings)} IP sightings: {e}")
+            raise
+
+    async def add_ip_events(
+        self,
+        events: list[tuple[str, IPEventType, str | None, datetime | None]],
+        adapter_session: AdapterSession | None = None,
+    ) -> None:
+        try:
+            await self._db_manager.ip_manager.add_ip_events(
+                events=events,
+                current_session=adapter_session,
+            )
+        except Exception as e:
+            logger.error(f"Error adding {len(events)} IP events: {e}")
+            raise
+
+    async def get_ip_events(
+        self,
+        ip: str,
+        before_id: int | None = None,
+        limit: int = 50,
+        adapter_session: AdapterSession | None = None,
+    ) -> list[tuple[IPAddressEvent, datetime | None]]:
+        try:
+            return await self._db_manager.ip_manager.get_ip_events(
+                ip=ip,
+                before_id=before_id,
+                limit=limit,
+                current_session=adapter_session,
+            )
+        except Exception as e:
+            logger.error(f"Error getting events of IP {ip}: {e}")
+            raise
+
+    async def purge_ip_events(self, older_than: datetime, batch_size: int) -> int:
+        # Batches commit one by one, never in a caller's transaction.
+        try:
+            return await self._db_manager.ip_manager.purge_ip_events(
+                older_than=older_than,
+                batch_size=batch_size,
+            )
+        except Exception as e:
+            logger.error(f"Error purging IP events older than {older_than}: {e}")
+            raise
+
+    async def ensure_partitions(self, weeks_ahead: int) -> list[str]:
+        # Partition DDL commits step by step, never in a caller's transaction.
+        try:
+            return await self._db_manager.ip_manager.ensure_partitions(
+                weeks_ahead=weeks_ahead,
+            )
+        except Exception as e:
+            logger.error(f"Error creating ip_address partitions: {e}")
+            raise
+
     async def check_ip_exists(
         self,
         ip: str,
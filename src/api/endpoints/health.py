@@ -0,0 +1,32 @@
+from fastapi import APIRouter, Depends, Response, status
+
+from src.api.schema import LivenessResponse, ReadinessResponse
+from src.common.dependencies import get_db_manager
+from src.common.health import health_monitor
+from src.db.managers.db_manager import DBManager
+
+router = APIRouter()
+
+
+@router.get(
+    "/live",
+    response_model=LivenessResponse,
+)
+async def live() -> LivenessResponse:
+    return LivenessResponse()
+
+
+@router.get(
+    "/ready",
+    response_model=ReadinessResponse,
+)
+async def ready(
+    response: Response,
+    db_manager: DBManager = Depends(get_db_manager),
+) -> ReadinessResponse:
+    readiness = await health_monitor.readiness(db_manager)
+
+    if not readiness["ready"]:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+
+    return ReadinessResponse(**readiness)
@@ -1,10 +1,32 @@
-from fastapi import APIRouter, Depends, Header, HTTPException, status
+from datetime import datetime
+from typing import Any, Literal
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
 
 import settings
-from src.api.exceptions import BaseAPIException
-from src.api.schema import IPAddressResponse, ReactivateIPRequest
+from src.api.exceptions import (
+    BaseAPIException,
+    MemorySnapshotNotFoundException,
+    MemoryTracingDisabledException,
+    ProfileNotFoundException,
+)
+from src.api.schema import (
+    IPAddressResponse,
+    IPHistoryResponse,
+    MemoryAllocationResponse,
+    MemorySnapshotResponse,
+    ProfileSummaryResponse,
+    ReactivateIPRequest,
+    SQLStatementResponse,
+)
 from src.bl.bl_manager import BLManager
+from src.bl.services.ip_address_service import sighting_aggregator
+from src.common.blacklist_events import blacklist_events
 from src.common.dependencies import get_bl_manager
+from src.common.memory import GroupBy, MemorySnapshot, memory_profiler
+from src.common.profiling import profile_store
+from src.db.tracing import sql_tracer
 
 router = APIRouter()
 
@@ -42,3 +64,196 @@ async def reactivate_ip(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Internal Server Error: {str(e)}",
         )
+
+
+@router.get(
+    "/ip-history",
+    response_model=IPHistoryResponse,
+    dependencies=[Depends(verify_internal_token)],
+)
+async def get_ip_history(
+    ip: str = Query(...),
+    before: int | None = Query(None, description="`next_before` of the previous page"),
+    limit: int = Query(50, ge=1, le=500),
+    bl_manager: BLManager = Depends(get_bl_manager),
+) -> IPHistoryResponse:
+    # Operator-only: reasons are free text given to /reactivate.
+    return await bl_manager.ip_service.get_ip_history(
+        ip=ip,
+        before=before,
+        limit=limit,
+    )
+
+
+@router.get(
+    "/profiles",
+    response_model=list[ProfileSummaryResponse],
+    dependencies=[Depends(verify_internal_token)],
+)
+async def list_profiles() -> list[ProfileSummaryResponse]:
+    return [
+        ProfileSummaryResponse(
+            id=profile.id,
+            method=profile.method,
+            path=profile.path,
+            started_at=datetime.fromtimestamp(profile.started_at),
+            duration=profile.duration,
+            samples=profile.samples,
+        )
+        for profile in profile_store.profiles()
+    ]
+
+
+@router.get(
+    "/profiles/{profile_id}",
+    response_class=PlainTextResponse,
+    dependencies=[Depends(verify_internal_token)],
+)
+async def download_profile(profile_id: int) -> str:
+    """Collapsed stacks, ready for flamegraph.pl / speedscope."""
+    profile = profile_store.get(profile_id)
+
+    if profile is None:
+        raise ProfileNotFoundException()
+
+    return profile.collapsed
+
+
+@router.get(
+    "/sql/top",
+    response_model=list[SQLStatementResponse],
+    dependencies=[Depends(verify_internal_token)],
+)
+async def top_sql_statements(
+    limit: int = Query(10, ge=1, le=100),
+    order_by: Literal["total_ms", "max_ms", "calls", "rows"] = "total_ms",
+) -> list[SQLStatementResponse]:
+    return [
+        SQLStatementResponse(**stats)
+        for stats in sql_tracer.top(limit=limit, order_by=order_by)
+    ]
+
+
+@router.get(
+    "/sightings",
+    dependencies=[Depends(verify_internal_token)],
+)
+async def sighting_stats() -> dict[str, Any]:
+    return sighting_aggregator.stats()
+
+
+@router.get(
+    "/blacklist-stream",
+    dependencies=[Depends(verify_internal_token)],
+)
+async def blacklist_stream_stats() -> dict[str, Any]:
+    return blacklist_events.stats()
+
+
+def _snapshot_response(snapshot: MemorySnapshot) -> MemorySnapshotResponse:
+    return MemorySnapshotResponse(
+        id=snapshot.id,
+        taken_at=datetime.fromtimestamp(snapshot.taken_at),
+        traced_bytes=snapshot.traced_bytes,
+        blocks=snapshot.blocks,
+    )
+
+
+def _get_memory_snapshot(snapshot_id: int) -> MemorySnapshot:
+    snapshot = memory_profiler.get(snapshot_id)
+
+    if snapshot is None:
+        raise MemorySnapshotNotFoundException()
+
+    return snapshot
+
+
+@router.get(
+    "/memory",
+    dependencies=[Depends(verify_internal_token)],
+)
+async def memory_stats() -> dict[str, Any]:
+    """RSS, GC object and task counts of this worker, plus tracemalloc
+    totals while tracing."""
+    return memory_profiler.stats()
+
+
+@router.post(
+    "/memory/tracing",
+    dependencies=[Depends(verify_internal_token)],
+)
+async def start_memory_tracing(
+    frames: int | None = Query(None, ge=1, le=64),
+) -> dict[str, Any]:
+    memory_profiler.start(frames=frames)
+    return memory_profiler.stats()
+
+
+@router.delete(
+    "/memory/tracing",
+    dependencies=[Depends(verify_internal_token)],
+)
+async def stop_memory_tracing() -> dict[str, Any]:
+    """Stops tracing and drops the snapshots taken so far."""
+    memory_profiler.stop()
+    return memory_profiler.stats()
+
+
+@router.get(
+    "/memory/snapshots",
+    response_model=list[MemorySnapshotResponse],
+    dependencies=[Depends(verify_internal_token)],
+)
+async def list_memory_snapshots() -> list[MemorySnapshotResponse]:
+    return [_snapshot_response(snapshot) for snapshot in memory_profiler.snapshots()]
+
+
+@router.post(
+    "/memory/snapshots",
+    response_model=MemorySnapshotResponse,
+    dependencies=[Depends(verify_internal_token)],
+)
+async def take_memory_snapshot() -> MemorySnapshotResponse:
+    snapshot = await memory_profiler.take()
+
+    if snapshot is None:
+        raise MemoryTracingDisabledException()
+
+    return _snapshot_response(snapshot)
+
+
+@router.get(
+    "/memory/snapshots/{snapshot_id}",
+    response_model=list[MemoryAllocationResponse],
+    dependencies=[Depends(verify_internal_token)],
+)
+async def top_memory_allocations(
+    snapshot_id: int,
+    limit: int = Query(25, ge=1, le=500),
+    group_by: GroupBy = "lineno",
+) -> list[MemoryAllocationResponse]:
+    """Largest allocation sites still alive in the snapshot."""
+    snapshot = _get_memory_snapshot(snapshot_id)
+    stats = await memory_profiler.top(snapshot, limit=limit, group_by=group_by)
+    return [MemoryAllocationResponse(**stat) for stat in stats]
+
+
+@router.get(
+    "/memory/snapshots/{snapshot_id}/diff",
+    response_model=list[MemoryAllocationResponse],
+    dependencies=[Depends(verify_internal_token)],
+)
+async def diff_memory_snapshots(
+    snapshot_id: int,
+    base: int = Query(..., description="Snapshot to compare against"),
+    limit: int = Query(25, ge=1, le=500),
+    group_by: GroupBy = "lineno",
+) -> list[MemoryAllocationResponse]:
+    """Allocation sites that grew the most between `base` and this
+    snapshot."""
+    base_snapshot = _get_memory_snapshot(base)
+    snapshot = _get_memory_snapshot(snapshot_id)
+    stats = await memory_profiler.compare(
+        base_snapshot, snapshot, limit=limit, group_by=group_by,
+    )
+    return [MemoryAllocationResponse(**stat) for stat in stats]
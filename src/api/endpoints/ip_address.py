@@ -1,12 +1,40 @@
-from fastapi import APIRouter, Depends
-from fastapi.responses import PlainTextResponse
+import json
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Literal
+
+from fastapi import (
+    APIRouter,
+    Depends,
+    Header,
+    Query,
+    Request,
+    WebSocket,
+    WebSocketDisconnect,
+    status,
+)
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+
+import settings
 
 from src.api.exceptions import (
     BaseAPIException,
 )
-from src.api.schema import IPAddressCreate, IPAddressResponse
+from src.api.schema import (
+    IPAddressCreate,
+    IPAddressResponse,
+    SightingReportRequest,
+    SightingReportResponse,
+)
 from src.bl.bl_manager import BLManager
+from src.common.blacklist_events import (
+    BlacklistEvent,
+    SlowConsumerError,
+    Subscription,
+    SubscriptionClosedError,
+    blacklist_events,
+)
 from src.common.dependencies import get_bl_manager
+from src.common.enums import AddressFamily
 
 router = APIRouter()
 
@@ -25,12 +53,170 @@ async def add_ip_address(
         raise e
 
 
+@router.post(
+    "/report",
+    response_model=SightingReportResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def report_sightings(
+    request: SightingReportRequest,
+    bl_manager: BLManager = Depends(get_bl_manager),
+) -> SightingReportResponse:
+    try:
+        return await bl_manager.ip_service.report_sightings(report=request)
+    except BaseAPIException as e:
+        raise e
+
+
 @router.get(
     "/blacklist",
     response_class=PlainTextResponse,
 )
 async def get_blacklist(
+    family: AddressFamily | None = Query(None),
+    prefix: str | None = Query(None, description="Only IPs inside this CIDR"),
+    shard_index: int = Query(0, ge=0),
+    shard_count: int = Query(1, ge=1, le=1024),
+    shard_by: Literal["range", "hash"] = Query("range"),
     bl_manager: BLManager = Depends(get_bl_manager),
 ) -> str:
-    ips = await bl_manager.ip_service.get_blacklisted_ips()
-    return "\n".join(ips) + "\n" if ips else ""
+    feed_filter = bl_manager.ip_service.build_feed_filter(
+        family=family,
+        prefix=prefix,
+        shard_index=shard_index,
+        shard_count=shard_count,
+        shard_by=shard_by,
+    )
+    return await bl_manager.ip_service.get_blacklist_feed(feed_filter=feed_filter)
+
+
+@router.post("/lookup")
+async def bulk_lookup(
+    request: Request,
+    family: AddressFamily = Query(
+        AddressFamily.IPV4,
+        description="Address family of a binary body",
+    ),
+    bl_manager: BLManager = Depends(get_bl_manager),
+) -> Response:
+    """Blacklisted subset of a batch of IPs.
+
+    `text/plain` bodies hold one IP per line and get the matches back the
+    same way (IPv4 first, each in request order). `application/octet-stream`
+    bodies are concatenated packed addresses of `family` and get packed
+    matches back.
+    """
+    packed = request.headers.get("content-type", "").startswith(
+        "application/octet-stream"
+    )
+    content_length = request.headers.get("content-length", "")
+    result = await bl_manager.ip_service.lookup_blacklisted(
+        chunks=request.stream(),
+        packed_family=family if packed else None,
+        content_length=int(content_length) if content_length.isdigit() else None,
+    )
+
+    return Response(
+        content=result.body,
+        media_type="application/octet-stream" if packed else "text/plain",
+        headers={
+            "X-Lookup-Total": str(result.total),
+            "X-Lookup-Matched": str(result.matched),
+            "X-Lookup-Invalid": str(result.invalid),
+        },
+    )
+
+
+async def _stream_messages(
+    subscription: Subscription,
+    initial: dict[str, Any] | list[BlacklistEvent],
+) -> AsyncIterator[dict[str, Any] | None]:
+    """Initial snapshot/delta followed by live events; None marks an idle
+    heartbeat interval. Ends when the subscriber falls too far behind or
+    the process shuts down."""
+    try:
+        if isinstance(initial, dict):
+            yield initial
+        else:
+            for event in initial:
+                yield blacklist_events.event_message(event)
+
+        while True:
+            try:
+                event = await subscription.next(
+                    timeout=settings.BLACKLIST_STREAM_HEARTBEAT,
+                )
+            except SlowConsumerError:
+                yield {"type": "overflow", "cursor": None}
+                return
+            except SubscriptionClosedError:
+                yield {"type": "reconnect", "cursor": None}
+                return
+
+            yield blacklist_events.event_message(event) if event else None
+    finally:
+        subscription.close()
+
+
+async def _sse_events(
+    subscription: Subscription,
+    initial: dict[str, Any] | list[BlacklistEvent],
+) -> AsyncIterator[str]:
+    async with aclosing(_stream_messages(subscription, initial)) as messages:
+        async for message in messages:
+            if message is None:
+                yield ": heartbeat\n\n"
+                continue
+
+            event_id = f"id: {message['cursor']}\n" if message["cursor"] else ""
+            yield (
+                f"{event_id}event: {message['type']}\n"
+                f"data: {json.dumps(message, separators=(',', ':'))}\n\n"
+            )
+
+
+@router.get("/blacklist/stream")
+async def stream_blacklist(
+    cursor: str | None = Query(None, description="Resume after this cursor"),
+    last_event_id: str | None = Header(None, alias="Last-Event-ID"),
+    bl_manager: BLManager = Depends(get_bl_manager),
+) -> StreamingResponse:
+    """Server-sent events: a `snapshot` (or the missed events when resuming),
+    then `add`/`remove` events. An `overflow` event means the client fell
+    behind and must reconnect; `reconnect` means the worker is restarting
+    and the client should resume with its last event id."""
+    subscription, initial = await bl_manager.ip_service.subscribe_blacklist(
+        cursor=last_event_id or cursor,
+    )
+    return StreamingResponse(
+        _sse_events(subscription, initial),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.websocket("/blacklist/ws")
+async def blacklist_websocket(
+    websocket: WebSocket,
+    cursor: str | None = Query(None, description="Resume after this cursor"),
+    bl_manager: BLManager = Depends(get_bl_manager),
+) -> None:
+    """Same messages as `/blacklist/stream` as JSON text frames."""
+    await websocket.accept()
+    subscription, initial = await bl_manager.ip_service.subscribe_blacklist(
+        cursor=cursor,
+    )
+
+    try:
+        async with aclosing(_stream_messages(subscription, initial)) as messages:
+            async for message in messages:
+                # Heartbeats also surface dead connections between events.
+                await websocket.send_json(message or {"type": "heartbeat"})
+                if message and message["type"] == "overflow":
+                    await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+                    return
+                if message and message["type"] == "reconnect":
+                    await websocket.close(code=status.WS_1012_SERVICE_RESTART)
+                    return
+    except WebSocketDisconnect:
+        return
@@ -61,3 +61,68 @@ class InvalidTTLException(BaseAPIException):
             detail="TTL must be >=1 and <=365 days",
             error_code="INVALID_TTL",
         )
+
+
+class InvalidShardException(BaseAPIException):
+    def __init__(self) -> None:
+        super().__init__(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="shard_index must be >=0 and < shard_count",
+            error_code="INVALID_SHARD",
+        )
+
+
+class BulkLookupTooLargeException(BaseAPIException):
+    def __init__(self, max_ips: int) -> None:
+        super().__init__(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {max_ips} IPs per lookup",
+            error_code="LOOKUP_TOO_LARGE",
+        )
+
+
+class ProfileNotFoundException(BaseAPIException):
+    def __init__(self) -> None:
+        super().__init__(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found",
+            error_code="PROFILE_NOT_FOUND",
+        )
+
+
+class MemorySnapshotNotFoundException(BaseAPIException):
+    def __init__(self) -> None:
+        super().__init__(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Memory snapshot not found",
+            error_code="MEMORY_SNAPSHOT_NOT_FOUND",
+        )
+
+
+class MemoryTracingDisabledException(BaseAPIException):
+    def __init__(self) -> None:
+        super().__init__(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Memory tracing is not running, start it first",
+            error_code="MEMORY_TRACING_DISABLED",
+        )
+
+
+class TooManyRequestsException(BaseAPIException):
+    def __init__(self, retry_after: str) -> None:
+        super().__init__(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many requests queued, retry later",
+            headers={"Retry-After": retry_after},
+            error_code="TOO_MANY_REQUESTS",
+        )
+
+
+class ServiceOverloadedException(BaseAPIException):
+    def __init__(self, retry_after: str) -> None:
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Service overloaded, retry later",
+            headers={"Retry-After": retry_after},
+            error_code="SERVICE_OVERLOADED",
+        )
@@ -0,0 +1,137 @@
+import asyncio
+import random
+import threading
+import time
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+import settings
+from src.api.endpoints.internal import verify_internal_token
+from src.api.exceptions import BaseAPIException
+from src.common.admission import AdmissionLimiter, admission_limiters
+from src.common.profiling import SamplingProfiler, profile_store
+
+PROFILE_HEADER = b"x-profile"
+TOKEN_HEADER = b"x-internal-token"
+# Long-lived responses: they'd hold an admission slot or a profiler for
+# as long as the client stays connected.
+STREAMING_PATHS = frozenset({"/ip/blacklist/stream"})
+# POST only because of the request body size; served from memory like GETs.
+READ_ONLY_POST_PATHS = frozenset({"/ip/lookup"})
+
+
+class ProfilingMiddleware:
+    """Profiles a request when it carries `X-Profile: 1` together with a
+    valid `X-Internal-Token`, or when it is picked by PROFILE_SAMPLE_RATE.
+
+    The profile id is returned in the `X-Profile-Id` response header.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def _should_profile(self, scope: Scope) -> bool:
+        sample_rate = settings.PROFILE_SAMPLE_RATE
+        if sample_rate and random.random() < sample_rate:
+            return True
+
+        if (PROFILE_HEADER, b"1") not in scope["headers"]:
+            return False
+
+        headers = dict(scope["headers"])
+
+        try:
+            await verify_internal_token(
+                api_token=headers.get(TOKEN_HEADER, b"").decode("latin-1"),
+            )
+        except HTTPException:
+            return False
+
+        return True
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["path"] in STREAMING_PATHS
+            or not await self._should_profile(scope)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        profiler = SamplingProfiler(
+            thread_id=threading.get_ident(),
+            interval=settings.PROFILE_INTERVAL,
+        )
+        profile_id = profile_store.next_id()
+
+        async def send_with_profile_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (b"x-profile-id", str(profile_id).encode()),
+                ]
+            await send(message)
+
+        started_at = time.time()
+        start = time.perf_counter()
+        profiler.start()
+
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            # The join waits out a sample in progress, which would stall
+            # every request on the loop.
+            stacks = await asyncio.to_thread(profiler.stop)
+            profile_store.add(
+                profile_id=profile_id,
+                method=scope["method"],
+                path=scope["path"],
+                started_at=started_at,
+                duration=time.perf_counter() - start,
+                stacks=stacks,
+            )
+
+
+class AdmissionControlMiddleware:
+    """Runs every API request under the limiter of its route class so that
+    bursts of writes can't starve blacklist readers (and vice versa).
+
+    Health checks, the root endpoint and streaming responses are never
+    limited.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    def _limiter(self, scope: Scope) -> AdmissionLimiter | None:
+        path: str = scope["path"]
+
+        if path in STREAMING_PATHS:
+            return None
+        if path.startswith("/internal"):
+            return admission_limiters["internal"]
+        if not path.startswith("/ip"):
+            return None
+        if scope["method"] in ("GET", "HEAD") or path in READ_ONLY_POST_PATHS:
+            return admission_limiters["read"]
+        return admission_limiters["write"]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        limiter = self._limiter(scope) if scope["type"] == "http" else None
+
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            async with limiter.acquire():
+                await self.app(scope, receive, send)
+        except BaseAPIException as e:
+            response = JSONResponse(
+                {"detail": e.detail, "error_code": e.error_code},
+                status_code=e.status_code,
+                headers=e.headers,
+            )
+            await response(scope, receive, send)
@@ -1,8 +1,9 @@
 from datetime import datetime
+from typing import Any
 
 from pydantic import BaseModel, ConfigDict, Field
 
-from src.common.enums import IPStatus
+from src.common.enums import IPEventType, IPStatus
 from src.common.schemas.ip_address import IPAddressBase
 
 
@@ -36,6 +37,38 @@ class BlacklistResponse(BaseModel):
     ips: list[str]
 
 
+class SightingReportRequest(BaseModel):
+    ips: list[str] = Field(..., min_length=1, max_length=10_000)
+
+
+class IPValidationErrorResponse(BaseModel):
+    index: int
+    value: str
+    reason: str
+
+
+class SightingReportResponse(BaseModel):
+    accepted: int
+    dropped: int
+    errors: list[IPValidationErrorResponse]
+
+
+class IPEventResponse(BaseModel):
+    id: int | None  # None for an EXPIRED entry inferred from expires_at
+    event: IPEventType
+    reason: str | None
+    created_at: datetime
+    expires_at: datetime | None = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class IPHistoryResponse(BaseModel):
+    ip: str
+    items: list[IPEventResponse]
+    next_before: int | None
+
+
 class ErrorResponse(BaseModel):
     detail: str
     error_code: str | None = None
@@ -44,3 +77,52 @@ class ErrorResponse(BaseModel):
 class ReactivateIPRequest(BaseModel):
     ip: str
     reason: str | None = None
+
+
+class LivenessResponse(BaseModel):
+    status: str = "ok"
+
+
+class ReadinessResponse(BaseModel):
+    ready: bool
+    database: bool
+    probe_age: float
+    pool: dict[str, Any]
+    blacklist_age: float | None
+    background_lag: dict[str, float]
+    admission: dict[str, dict[str, int | float]]
+
+
+class ProfileSummaryResponse(BaseModel):
+    id: int
+    method: str
+    path: str
+    started_at: datetime
+    duration: float
+    samples: int
+
+
+class SQLStatementResponse(BaseModel):
+    fingerprint: str
+    calls: int
+    total_ms: float
+    mean_ms: float
+    max_ms: float
+    rows: int
+    histogram: dict[str, int]  # le_<bound>ms buckets, then inf
+
+
+class MemorySnapshotResponse(BaseModel):
+    id: int
+    taken_at: datetime
+    traced_bytes: int
+    blocks: int
+
+
+class MemoryAllocationResponse(BaseModel):
+    location: str  # file:line of the allocating frame
+    size: int
+    count: int
+    size_diff: int | None = None
+    count_diff: int | None = None
+    traceback: list[str] | None = None
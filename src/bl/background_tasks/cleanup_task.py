@@ -0,0 +1,7 @@
+from src.bl.bl_manager import BLManager
+
+
+async def run_cleanup(bl_manager: BLManager) -> None:
+    """Keep the weekly ip_address partitions ahead of time, expire old
+    ones by dropping whole partitions and purge old lifecycle events."""
+    await bl_manager.ip_service.maintain_partitions()
@@ -0,0 +1,30 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable
+
+from src.common.health import health_monitor
+
+logger = logging.getLogger(__name__)
+
+
+async def run_periodically(
+    name: str,
+    interval: float,
+    func: Callable[[], Awaitable[None]],
+) -> None:
+    """Run `func` every `interval` seconds until cancelled.
+
+    Failures are logged and retried on the next tick; successful runs are
+    reported to the health monitor so readiness can expose task lag.
+    """
+    health_monitor.heartbeat(name, interval)
+
+    while True:
+        await asyncio.sleep(interval)
+
+        try:
+            await func()
+        except Exception:
+            logger.exception(f"Background task {name} failed")
+        else:
+            health_monitor.heartbeat(name, interval)
@@ -1,4 +1,7 @@
+from sqlalchemy.ext.asyncio.session import _AsyncSessionContextManager  # type: ignore
+
 from src.adapters.adapters_manager import AdaptersManager
+from src.adapters.helpers import AdapterSession
 
 
 class BaseService:
@@ -8,3 +11,6 @@ class BaseService:
     @property
     def adapters_manager(self) -> AdaptersManager:
         return self._adapters_manager
+
+    def unit_of_work(self) -> _AsyncSessionContextManager[AdapterSession]:
+        return self._adapters_manager.unit_of_work()
@@ -1,19 +1,60 @@
+import asyncio
 import logging
+import time
 from datetime import datetime, timedelta
+from ipaddress import ip_network
+from math import ceil
+from typing import Any, AsyncIterable, Literal
 
 import settings
 from src.adapters.adapters_manager import AdaptersManager
 from src.api.exceptions import (
+    BulkLookupTooLargeException,
     DuplicateIPException,
+    InvalidShardException,
     InvalidTTLException,
+    IPValidationException,
     IPNotFoundException,
+    TooManyRequestsException,
+)
+from src.api.schema import (
+    IPAddressCreate,
+    IPAddressResponse,
+    IPEventResponse,
+    IPHistoryResponse,
+    IPValidationErrorResponse,
+    SightingReportRequest,
+    SightingReportResponse,
 )
-from src.api.schema import IPAddressCreate, IPAddressResponse
 from src.bl.services.base_service import BaseService
-from src.common.enums import IPStatus
+from src.common.blacklist import FeedFilter, blacklist_store
+from src.common.blacklist_events import (
+    BlacklistEvent,
+    EventOp,
+    Subscription,
+    blacklist_events,
+)
+from src.common.bulk_lookup import (
+    PACKED_SIZE,
+    BulkLookupResult,
+    lookup_packed,
+    max_body_size,
+    lookup_text,
+)
+from src.common.enums import AddressFamily, IPEventType, IPStatus
+from src.common.expiry import expiry_timestamp
+from src.common.ip_validation import parse_address, validate_ip_batch
+from src.common.sightings import SightingAggregator
+from src.common.single_flight import SingleFlight
+from src.common.snapshot_file import snapshot_persister
 
 logger = logging.getLogger(__name__)
 
+_blacklist_flight: SingleFlight[None] = SingleFlight()
+sighting_aggregator = SightingAggregator(
+    max_pending_ips=settings.SIGHTING_MAX_PENDING_IPS,
+)
+
 
 class IPAddressService(BaseService):
     def __init__(self, adapters_manager: AdaptersManager) -> None:
@@ -32,22 +73,37 @@ class IPAddressService(BaseService):
         return datetime.now() + timedelta(days=ttl_days + settings.IP_COOLING_PERIOD)
 
     async def add_ip_address(self, ip_data: IPAddressCreate) -> IPAddressResponse:
-        if await self.adapters_manager.ip_adapter.check_ip_exists(ip=ip_data.ip):
-            raise DuplicateIPException()
+        ip_adapter = self.adapters_manager.ip_adapter
 
-        expires_at = await self._calculate_expires_at(
-            ttl_days=ip_data.ttl,
-        )
+        async with self.unit_of_work() as session:
+            if await ip_adapter.check_ip_exists(
+                ip=ip_data.ip,
+                adapter_session=session,
+            ):
+                raise DuplicateIPException()
 
-        new_ip = await self.adapters_manager.ip_adapter.create_ip(
-            ip=ip_data.ip,
-            status=ip_data.status,
-            description=ip_data.description,
-            expires_at=expires_at,
-            last_blacklist_at=datetime.now(),
-        )
+            expires_at = await self._calculate_expires_at(
+                ttl_days=ip_data.ttl,
+            )
+
+            new_ip = await ip_adapter.create_ip(
+                ip=ip_data.ip,
+                status=ip_data.status,
+                description=ip_data.description,
+                expires_at=expires_at,
+                last_blacklist_at=datetime.now(),
+                adapter_session=session,
+            )
+            await ip_adapter.add_ip_events(
+                events=[(ip_data.ip, IPEventType.ADDED, None, expires_at)],
+                adapter_session=session,
+            )
 
         assert new_ip is not None
+        if new_ip.status == IPStatus.BLACKLIST:
+            # Applied right away so this process reads its own write; the
+            # change event that follows is a no-op here.
+            self._apply_blacklist_change("add", ip_data.ip, expires_at)
 
         return IPAddressResponse(
             id=new_ip.id,
@@ -57,39 +113,345 @@ class IPAddressService(BaseService):
             last_blacklist_at=new_ip.last_blacklist_at,
         )
 
+    async def get_ip_history(
+        self,
+        ip: str,
+        before: int | None = None,
+        limit: int = 50,
+    ) -> IPHistoryResponse:
+        try:
+            ip = parse_address(ip).normalized
+        except ValueError:
+            raise IPValidationException()
+
+        events = await self.adapters_manager.ip_adapter.get_ip_events(
+            ip=ip,
+            before_id=before,
+            limit=limit,
+        )
+
+        # Expiries aren't stored as events: the row an event set expires_at
+        # on expired if nothing happened to the IP before that time.
+        now = datetime.now()
+        items: list[IPEventResponse] = []
+        for event, superseded_at in events:
+            expires_at = event.expires_at
+            if expires_at is not None and expires_at <= (superseded_at or now):
+                items.append(
+                    IPEventResponse(
+                        id=None,
+                        event=IPEventType.EXPIRED,
+                        reason=None,
+                        created_at=expires_at,
+                    )
+                )
+            items.append(IPEventResponse.model_validate(event))
+
+        return IPHistoryResponse(
+            ip=ip,
+            items=items,
+            next_before=events[-1][0].id if len(events) == limit else None,
+        )
+
     async def get_blacklisted_ips(self) -> list[str]:
         return await self.adapters_manager.ip_adapter.get_blacklisted_ips()
 
+    async def _load_blacklist(self) -> None:
+        built_at = time.time()
+        blacklist_store.hold_changes()
+        try:
+            entries = await self.adapters_manager.ip_adapter.get_blacklist_entries()
+        except Exception:
+            blacklist_store.release_changes()
+            raise
+
+        blacklist_store.replace(
+            ips=[ip for ip, _ in entries],
+            built_at=built_at,
+            expires_at={ip: expiry_timestamp(expires_at) for ip, expires_at in entries},
+        )
+        snapshot = blacklist_store.snapshot
+        assert snapshot is not None
+        blacklist_events.sync(snapshot.ips)
+
+    async def refresh_blacklist(self) -> None:
+        """Reload the blacklist from the DB; concurrent callers share a
+        single query."""
+        await _blacklist_flight.do("blacklist", self._load_blacklist)
+
+    async def _ensure_blacklist(self) -> None:
+        """Load the blacklist on first use. Once loaded (or restored from
+        disk) it's kept current by change events and expiries, not reloaded:
+        a DB that is down doesn't hold up reads."""
+        if not blacklist_store.loaded:
+            await self.refresh_blacklist()
+
+    def _apply_blacklist_change(
+        self,
+        op: EventOp,
+        ip: str,
+        expires_at: datetime | None,
+    ) -> None:
+        if blacklist_store.apply(op, ip, expiry_timestamp(expires_at)):
+            blacklist_events.publish(op, [ip])
+
+    async def follow_blacklist_changes(self) -> None:
+        """Keep the in-memory blacklist in step with the writes of every
+        process. Changes are LISTENed for; the blacklist is loaded in full
+        each time listening (re)starts, which covers whatever was missed
+        while it wasn't. The restored snapshot is served until then."""
+        ip_adapter = self.adapters_manager.ip_adapter
+
+        while True:
+            try:
+                async with ip_adapter.listen_blacklist_changes(
+                    on_change=self._apply_blacklist_change,
+                ) as listener:
+                    await self.refresh_blacklist()
+                    await listener.wait_lost(
+                        keepalive=settings.BLACKLIST_LISTEN_KEEPALIVE,
+                    )
+                logger.warning("Blacklist change listener disconnected")
+            except Exception:
+                logger.exception("Blacklist change listener failed")
+
+            await asyncio.sleep(settings.BLACKLIST_RECONCILE_RETRY_INTERVAL)
+
+    @staticmethod
+    def build_feed_filter(
+        family: AddressFamily | None = None,
+        prefix: str | None = None,
+        shard_index: int = 0,
+        shard_count: int = 1,
+        shard_by: Literal["range", "hash"] = "range",
+    ) -> FeedFilter | None:
+        if not 0 <= shard_index < shard_count:
+            raise InvalidShardException()
+
+        network = None
+        if prefix is not None:
+            try:
+                network = ip_network(prefix, strict=False)
+            except ValueError:
+                raise IPValidationException(
+                    detail="Invalid prefix",
+                    error_code="INVALID_PREFIX",
+                )
+
+        feed_filter = FeedFilter(
+            family=family.value if family else None,
+            prefix=network,
+            shard_index=shard_index,
+            shard_count=shard_count,
+            shard_by=shard_by,
+        )
+        return None if feed_filter == FeedFilter() else feed_filter
+
+    async def get_blacklist_feed(self, feed_filter: FeedFilter | None = None) -> str:
+        """Plain-text feed, one IP per line. Unfiltered feeds keep the
+        most-recently-blacklisted-first order; filtered ones are sorted by
+        address."""
+        await self._ensure_blacklist()
+        if feed_filter is None:
+            return blacklist_store.rendered()
+
+        return blacklist_store.index().render(feed_filter)
+
+    async def lookup_blacklisted(
+        self,
+        chunks: AsyncIterable[bytes],
+        packed_family: AddressFamily | None = None,
+        content_length: int | None = None,
+    ) -> BulkLookupResult:
+        """Blacklisted subset of a newline separated (`packed_family` None)
+        or binary packed batch of IPs, matched against the sorted index of
+        the current snapshot.
+
+        The body is read from `chunks` only up to the largest size
+        BULK_LOOKUP_MAX_IPS addresses can take, so an oversized upload is
+        refused without being buffered.
+        """
+        max_ips = settings.BULK_LOOKUP_MAX_IPS
+        family = None if packed_family is None else packed_family.value
+        max_size = max_body_size(max_ips, family)
+        if content_length is not None and content_length > max_size:
+            raise BulkLookupTooLargeException(max_ips=max_ips)
+
+        buffer = bytearray()
+        async for chunk in chunks:
+            buffer += chunk
+            if len(buffer) > max_size:
+                raise BulkLookupTooLargeException(max_ips=max_ips)
+        body = bytes(buffer)
+
+        if family is None:
+            count = body.count(b"\n") + 1
+        else:
+            count = len(body) // PACKED_SIZE[family]
+        if count > max_ips:
+            raise BulkLookupTooLargeException(max_ips=max_ips)
+
+        await self._ensure_blacklist()
+        index = blacklist_store.index()
+
+        # Parsing and bisecting 100k addresses takes long enough to stall
+        # every other request on the loop.
+        if family is None:
+            return await asyncio.to_thread(lookup_text, index, body)
+
+        try:
+            return await asyncio.to_thread(lookup_packed, index, body, family)
+        except ValueError as e:
+            raise IPValidationException(detail=str(e), error_code="INVALID_PACKED_IPS")
+
+    async def subscribe_blacklist(
+        self,
+        cursor: str | None = None,
+    ) -> tuple[Subscription, dict[str, Any] | list[BlacklistEvent]]:
+        if not blacklist_events.ready:
+            await self._ensure_blacklist()
+            snapshot = blacklist_store.snapshot
+            assert snapshot is not None
+            blacklist_events.sync(snapshot.ips)
+
+        return blacklist_events.subscribe(cursor=cursor)
+
+    async def expire_blacklist(self) -> None:
+        """Drop IPs whose expires_at has passed from the in-memory views."""
+        expired = blacklist_store.expire(time.time())
+        if expired:
+            blacklist_events.publish("remove", expired)
+
+    async def restore_blacklist_snapshot(self) -> None:
+        loaded = await snapshot_persister.load()
+        if loaded is None:
+            return
+
+        snapshot = blacklist_store.restore(*loaded, now=time.time())
+        if snapshot is not None:
+            blacklist_events.sync(snapshot.ips)
+            logger.info(
+                f"Restored blacklist snapshot v{snapshot.version} "
+                f"with {len(snapshot.ips)} IPs"
+            )
+
+    async def persist_blacklist_snapshot(self) -> None:
+        snapshot = blacklist_store.snapshot
+        if snapshot is not None:
+            await snapshot_persister.persist(snapshot, blacklist_store.expiries())
+
+    async def report_sightings(
+        self,
+        report: SightingReportRequest,
+    ) -> SightingReportResponse:
+        validation = validate_ip_batch(report.ips)
+        seen_at = datetime.now()
+        accepted = dropped = 0
+
+        for ip, count in zip(validation.valid, validation.occurrences):
+            if sighting_aggregator.record(ip=ip, seen_at=seen_at, count=count):
+                accepted += count
+            else:
+                dropped += count
+
+        if dropped and not accepted:
+            raise TooManyRequestsException(
+                retry_after=str(ceil(settings.SIGHTING_FLUSH_INTERVAL)),
+            )
+
+        return SightingReportResponse(
+            accepted=accepted,
+            dropped=dropped,
+            errors=[
+                IPValidationErrorResponse(
+                    index=error.index,
+                    value=error.value,
+                    reason=error.reason,
+                )
+                for error in validation.errors
+            ],
+        )
+
+    async def flush_sightings(self) -> None:
+        batch = sighting_aggregator.drain()
+        if not batch:
+            return
+
+        try:
+            await self.adapters_manager.ip_adapter.record_sightings(
+                sightings=[
+                    (ip, sighting.hits, sighting.last_seen)
+                    for ip, sighting in batch.items()
+                ],
+                promote_threshold=settings.SIGHTING_PROMOTE_THRESHOLD,
+                expires_at=await self._calculate_expires_at(),
+            )
+        except Exception:
+            sighting_aggregator.restore(batch)
+            raise
+
+        # IPs promoted to BLACKLISTED reach the store as change events.
+        sighting_aggregator.mark_flushed(batch)
+
+    async def maintain_partitions(self) -> None:
+        created = await self.adapters_manager.ip_adapter.ensure_partitions(
+            weeks_ahead=settings.PARTITION_WEEKS_AHEAD,
+        )
+        if created:
+            logger.info(f"Created ip_address partitions: {created}")
+
+        # Expired IPs already left the store on their expiry tick.
+        await self.adapters_manager.ip_adapter.cleanup_expired()
+
+        purged = await self.adapters_manager.ip_adapter.purge_ip_events(
+            older_than=datetime.now() - timedelta(days=settings.IP_EVENT_RETENTION),
+            batch_size=settings.IP_EVENT_PURGE_BATCH,
+        )
+        if purged:
+            logger.info(f"Purged {purged} ip_address_event rows")
+
     async def reblacklist_ip(self, ip: str, reason: str | None) -> IPAddressResponse:
-        ip_address = await self.adapters_manager.ip_adapter.get_ip_by_address(ip=ip)
-
-        if not ip_address:
-            raise IPNotFoundException
-
-        if ip_address.status != IPStatus.ARCHIVED:
-            logger.info(f"No need to re-blacklist {ip=}: {ip_address.status=}")
-            return IPAddressResponse(
-                id=ip_address.id,
-                status=ip_address.status,
-                created_at=ip_address.created_at,
-                updated_at=ip_address.updated_at,
-                last_blacklist_at=ip_address.last_blacklist_at,
+        ip_adapter = self.adapters_manager.ip_adapter
+
+        async with self.unit_of_work() as session:
+            ip_address = await ip_adapter.get_ip_by_address(
+                ip=ip,
+                for_update=True,
+                adapter_session=session,
             )
 
-        updated_ip_address = await self.adapters_manager.ip_adapter.update_ip(
-            ip=ip,
-            status=IPStatus.BLACKLIST,
-            last_blacklist_at=datetime.now(),
-            description=(
-                f"Re-blacklisted at {datetime.now().date()}: {reason}\n"
-                f"Previous description: {ip_address.description or None}"
-            ),
-            expires_at=await self._calculate_expires_at(
+            if not ip_address:
+                raise IPNotFoundException
+
+            if ip_address.status != IPStatus.ARCHIVED:
+                logger.info(f"No need to re-blacklist {ip=}: {ip_address.status=}")
+                return IPAddressResponse(
+                    id=ip_address.id,
+                    status=ip_address.status,
+                    created_at=ip_address.created_at,
+                    updated_at=ip_address.updated_at,
+                    last_blacklist_at=ip_address.last_blacklist_at,
+                )
+
+            # The reason goes to the event log, keeping the row fixed-size
+            # however often the IP re-offends.
+            expires_at = await self._calculate_expires_at(
                 ttl_days=settings.REPEATED_BLACKLIST_IP_TTL
-            ),
-        )
+            )
+            updated_ip_address = await ip_adapter.update_ip(
+                ip=ip,
+                status=IPStatus.BLACKLIST,
+                last_blacklist_at=datetime.now(),
+                expires_at=expires_at,
+                adapter_session=session,
+            )
+            await ip_adapter.add_ip_events(
+                events=[(ip, IPEventType.REBLACKLISTED, reason, expires_at)],
+                adapter_session=session,
+            )
 
         assert updated_ip_address is not None
+        self._apply_blacklist_change("add", ip, expires_at)
 
         return IPAddressResponse(
             id=updated_ip_address.id,
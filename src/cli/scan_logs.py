@@ -0,0 +1,272 @@
+"""Retroactive scan of access logs for IPs that are blacklisted now.
+
+Loads the blacklist once, either from the database or from an exported
+snapshot file, memory-maps every log, splits it into newline-aligned
+chunks and scans the chunks on a process pool. Matching lines are streamed
+to stdout (or --output) as chunks finish, per-IP hit counts are written at
+the end and throughput is reported on stderr:
+
+    python -m src.cli.scan_logs /var/log/nginx/access.log* --counts hits.tsv
+    python -m src.cli.scan_logs access.log --snapshot /tmp/ip-blacklist.snapshot
+"""
+import argparse
+import asyncio
+import math
+import mmap
+import os
+import re
+import socket
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import BinaryIO, Sequence
+
+import settings
+from src.common.ip_validation import parse_address
+
+# Deliberately loose and without lookarounds, which would make `re` several
+# times slower: only candidates in the blacklist are looked at again, and
+# `_occurrences` enforces the address boundaries for those.
+_IPV4_PATTERN = re.compile(rb"[0-9]+\.[0-9]+\.[0-9]+\.[0-9]+")
+_IPV6_PATTERN = re.compile(rb"[0-9A-Fa-f]*:[0-9A-Fa-f:]+")
+
+Chunk = tuple[str, int, int]
+
+# Characters that may not touch a match, per family.
+_BOUNDARY = {4: b"0123456789.", 6: b"0123456789ABCDEFabcdef:"}
+
+# Per worker process, set once by `_init_worker`.
+_blacklist: dict[int, frozenset[bytes]] = {}
+
+
+def _init_worker(ipv4: frozenset[bytes], ipv6: frozenset[bytes]) -> None:
+    _blacklist[4] = ipv4
+    _blacklist[6] = ipv6
+
+
+def _ipv6_hits(candidates: set[bytes]) -> dict[bytes, str]:
+    hits: dict[bytes, str] = {}
+    for candidate in candidates:
+        try:
+            packed = socket.inet_pton(socket.AF_INET6, candidate.decode())
+        except OSError:
+            continue
+        normalized = socket.inet_ntop(socket.AF_INET6, packed)
+        if normalized.encode() in _blacklist[6]:
+            hits[candidate] = normalized
+    return hits
+
+
+def _hits(mm: mmap.mmap, start: int, end: int) -> dict[bytes, tuple[int, str]]:
+    """Blacklisted spellings found in `mm[start:end]` -> (family, ip).
+
+    Candidates are pulled out with one `findall` per family and matched
+    with a set intersection, so chunks without hits (the common case) never
+    run per-address Python code.
+    """
+    hits = {
+        candidate: (4, candidate.decode())
+        for candidate in _blacklist[4].intersection(
+            _IPV4_PATTERN.findall(mm, start, end)
+        )
+    }
+
+    if _blacklist[6]:
+        candidates = set(_IPV6_PATTERN.findall(mm, start, end))
+        for candidate, ip in _ipv6_hits(candidates).items():
+            hits[candidate] = (6, ip)
+
+    return hits
+
+
+def _occurrences(
+    mm: mmap.mmap,
+    start: int,
+    end: int,
+    hits: dict[bytes, tuple[int, str]],
+) -> list[tuple[int, str]]:
+    """Offsets of the `hits` in `mm[start:end]`; a second regex pass, only
+    for the families that had any."""
+    found: list[tuple[int, str]] = []
+    families = {family for family, _ in hits.values()}
+
+    for family, pattern in ((4, _IPV4_PATTERN), (6, _IPV6_PATTERN)):
+        if family not in families:
+            continue
+        boundary = _BOUNDARY[family]
+        for match in pattern.finditer(mm, start, end):
+            hit = hits.get(match.group())
+            if hit is None or hit[0] != family:
+                continue
+            pos, after = match.start(), match.end()
+            if (pos == 0 or mm[pos - 1] not in boundary) and (
+                after >= len(mm) or mm[after] not in boundary
+            ):
+                found.append((pos, hit[1]))
+
+    found.sort()
+    return found
+
+
+def _scan_chunk(chunk: Chunk) -> tuple[int, list[bytes], Counter[str]]:
+    """Scan the lines that *start* in [start, end) of `path`."""
+    path, start, end = chunk
+    lines: list[bytes] = []
+    counts: Counter[str] = Counter()
+
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        size = len(mm)
+        if start > 0:
+            start = mm.find(b"\n", start - 1) + 1 or size
+        if end < size:
+            end = mm.find(b"\n", end - 1) + 1 or size
+        if start >= end:
+            return 0, lines, counts
+
+        hits = _hits(mm, start, end)
+        last_line_start = -1
+
+        for offset, ip in _occurrences(mm, start, end, hits) if hits else ():
+            counts[ip] += 1
+            line_start = mm.rfind(b"\n", start, offset) + 1 or start
+            if line_start == last_line_start:
+                continue
+            last_line_start = line_start
+            line_end = mm.find(b"\n", offset, end)
+            lines.append(mm[line_start : line_end + 1 if line_end >= 0 else end])
+
+    return end - start, lines, counts
+
+
+def split_chunks(paths: list[str], chunk_size: int) -> list[Chunk]:
+    chunks: list[Chunk] = []
+    for path in paths:
+        size = os.path.getsize(path)
+        for start in range(0, size, chunk_size):
+            chunks.append((path, start, min(start + chunk_size, size)))
+    return chunks
+
+
+def build_blacklist(ips: Sequence[str]) -> tuple[frozenset[bytes], frozenset[bytes]]:
+    """Canonical spellings per family. Canonical IPv4 is the only dotted
+    quad `inet_pton` accepts, so byte equality is address equality."""
+    values: dict[int, list[bytes]] = {4: [], 6: []}
+    for ip in ips:
+        try:
+            parsed = parse_address(ip)
+        except ValueError:
+            continue
+        values[parsed.version].append(parsed.normalized.encode())
+
+    return frozenset(values[4]), frozenset(values[6])
+
+
+async def load_from_db() -> list[str]:
+    from src.db.managers.db_manager import init_db_manager
+
+    db_manager = await init_db_manager(db_connection_url=settings.DATABASE_URL)
+    try:
+        return await db_manager.ip_manager.get_blacklisted_ip_addresses()
+    finally:
+        await db_manager.close()
+
+
+def load_blacklist(snapshot_path: str | None) -> list[str]:
+    if snapshot_path is None:
+        return asyncio.run(load_from_db())
+
+    from src.common.snapshot_file import read_snapshot
+
+    loaded = read_snapshot(snapshot_path)
+    if loaded is None:
+        raise SystemExit(f"Cannot read blacklist snapshot {snapshot_path}")
+
+    # The file may predate expiries; those IPs are no longer blacklisted.
+    snapshot, expires_at = loaded
+    now = time.time()
+    return [ip for ip in snapshot.ips if expires_at.get(ip, math.inf) > now]
+
+
+def scan(
+    paths: list[str],
+    ips: Sequence[str],
+    out: BinaryIO,
+    workers: int,
+    chunk_size: int,
+) -> tuple[int, Counter[str]]:
+    ipv4, ipv6 = build_blacklist(ips)
+    chunks = split_chunks(paths, chunk_size)
+    scanned = 0
+    counts: Counter[str] = Counter()
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(ipv4, ipv6),
+    ) as pool:
+        # `map` yields in submission order, so each file's lines stay sorted
+        # while later chunks are already being scanned.
+        for chunk_bytes, lines, chunk_counts in pool.map(_scan_chunk, chunks):
+            scanned += chunk_bytes
+            counts.update(chunk_counts)
+            out.writelines(lines)
+
+    return scanned, counts
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="+", help="log files to scan")
+    parser.add_argument(
+        "--snapshot",
+        help="exported blacklist snapshot to use instead of the database",
+    )
+    parser.add_argument("--output", help="file for matching lines (default stdout)")
+    parser.add_argument("--counts", help="file for per-IP hit counts (TSV)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-mb", type=int, default=64)
+    args = parser.parse_args()
+
+    load_start = time.perf_counter()
+    ips = load_blacklist(args.snapshot)
+    print(
+        f"Loaded {len(ips)} blacklisted IPs in "
+        f"{time.perf_counter() - load_start:.2f}s",
+        file=sys.stderr,
+    )
+
+    out = open(args.output, "wb") if args.output else sys.stdout.buffer
+    start = time.perf_counter()
+    try:
+        scanned, counts = scan(
+            paths=args.paths,
+            ips=ips,
+            out=out,
+            workers=args.workers,
+            chunk_size=args.chunk_mb * 1024 * 1024,
+        )
+    finally:
+        if args.output:
+            out.close()
+        else:
+            out.flush()
+    elapsed = time.perf_counter() - start
+
+    if args.counts:
+        with open(args.counts, "w") as f:
+            for ip, hits in counts.most_common():
+                f.write(f"{ip}\t{hits}\n")
+
+    print(
+        f"Scanned {scanned / 1e9:.2f} GB in {elapsed:.2f}s "
+        f"({scanned / 1e9 / elapsed if elapsed else 0:.2f} GB/s) with "
+        f"{args.workers} workers: {sum(counts.values())} hits on "
+        f"{len(counts)} blacklisted IPs",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
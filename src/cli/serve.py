@@ -0,0 +1,265 @@
+"""Production entry point for the API.
+
+Waits until the database accepts queries (and optionally migrates it),
+imports the app once so a broken build fails before anything is bound, then
+runs uvicorn with SERVE_WORKERS workers (one per available CPU by default),
+uvloop/httptools when they are installed, and the SERVE_* keep-alive,
+backlog and shutdown limits:
+
+    python -m src.cli.serve --migrate
+
+Every worker holds the blacklist in memory and follows the DB's change
+events, so they all serve the same data. Partition maintenance and the
+snapshot file are single-writer. The tracemalloc snapshots behind
+/internal/* do stay per worker: an /internal request (snapshot, then diff)
+lands on whichever worker accepts it, so profile with SERVE_WORKERS=1.
+
+Workers always run under a supervisor, a single one included. SIGHUP to
+the parent restarts them one at a time: each replacement finishes its
+startup before the worker it replaces is stopped, and a stopping worker
+ends its blacklist streams with a `reconnect` message and lets in-flight
+responses finish (up to SERVE_GRACEFUL_TIMEOUT).
+"""
+import argparse
+import asyncio
+import importlib
+import importlib.util
+import logging
+import math
+import multiprocessing
+import os
+import socket
+import sys
+import time
+from multiprocessing.synchronize import Event
+from typing import Callable
+
+import uvicorn
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+from uvicorn.supervisors.multiprocess import Multiprocess, Process
+
+import settings
+from src.common.blacklist_events import blacklist_events
+
+APP = "main:app"
+
+# Configured by uvicorn.Config, so messages share the server's log format.
+logger = logging.getLogger("uvicorn.error")
+
+
+def available_cpus() -> int:
+    """CPUs this process may run on, capped by a cgroup v2 CPU quota."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # not available outside Linux
+        cpus = os.cpu_count() or 1
+
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cpus = min(cpus, math.ceil(int(quota) / int(period)))
+    except (OSError, ValueError):
+        pass
+
+    return max(cpus, 1)
+
+
+def _installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+async def wait_for_db(timeout: float) -> None:
+    """Retry `SELECT 1` with backoff until it succeeds or `timeout` passes;
+    Postgres accepts TCP connections well before it can serve queries."""
+    engine = create_async_engine(url=settings.DATABASE_URL, poolclass=NullPool)
+    deadline = time.monotonic() + timeout
+    delay = 0.1
+
+    try:
+        while True:
+            try:
+                async with engine.connect() as connection:
+                    await connection.execute(text("SELECT 1"))
+                return
+            except Exception as e:
+                if time.monotonic() + delay > deadline:
+                    raise SystemExit(f"Database not ready after {timeout}s: {e}")
+                logger.info(f"Waiting for the database: {e}")
+
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 2)
+    finally:
+        await engine.dispose()
+
+
+async def migrate() -> None:
+    from src.db.managers.db_manager import init_db_manager
+
+    db_manager = await init_db_manager(
+        db_connection_url=settings.DATABASE_URL,
+        run_migrations=True,
+    )
+    await db_manager.close()
+
+
+class Server(uvicorn.Server):
+    """Sets `ready` once the app has started and is listening, and closes
+    the blacklist streams when the worker shuts down."""
+
+    def __init__(self, config: uvicorn.Config, ready: Event) -> None:
+        super().__init__(config=config)
+        self.ready = ready
+
+    async def startup(self, sockets: list[socket.socket] | None = None) -> None:
+        await super().startup(sockets=sockets)
+        if not self.should_exit:
+            self.ready.set()
+
+    async def shutdown(self, sockets: list[socket.socket] | None = None) -> None:
+        # Stop accepting first so reconnecting clients land on another
+        # worker; the base shutdown then waits for the drained streams along
+        # with every other in-flight request.
+        for server in self.servers:
+            server.close()
+        blacklist_events.close_all()
+        await super().shutdown(sockets=sockets)
+
+
+class Supervisor(Multiprocess):
+    """uvicorn's worker supervisor with a rolling SIGHUP restart: the
+    replacement is started and ready before the old worker gets SIGTERM,
+    so capacity never drops below the configured worker count.
+
+    The first worker has to start before the others are: a build whose
+    startup fails exits (`failed`) instead of being restarted in a loop.
+    """
+
+    def __init__(
+        self,
+        config: uvicorn.Config,
+        target: Callable[[list[socket.socket] | None], None],
+        sockets: list[socket.socket],
+        ready: Event,
+    ) -> None:
+        super().__init__(config=config, target=target, sockets=sockets)
+        self._ready = ready
+        self.failed = False
+
+    def _start_ready(self) -> Process | None:
+        self._ready.clear()
+        process = Process(self.config, self.target, self.sockets)
+        process.start()
+
+        deadline = time.monotonic() + settings.SERVE_WORKER_READY_TIMEOUT
+        while not self._ready.wait(0.5):
+            if not process.process.is_alive() or time.monotonic() > deadline:
+                logger.error(f"Worker [{process.pid}] failed to start")
+                process.terminate()
+                process.join()
+                return None
+
+        return process
+
+    def init_processes(self) -> None:
+        first = self._start_ready()
+        if first is None:
+            self.failed = True
+            self.should_exit.set()
+            return
+
+        self.processes.append(first)
+        for _ in range(self.processes_num - 1):
+            process = Process(self.config, self.target, self.sockets)
+            process.start()
+            self.processes.append(process)
+
+    def restart_all(self) -> None:
+        for idx, process in enumerate(self.processes):
+            replacement = self._start_ready()
+            if replacement is None:
+                # Keep serving with the old workers rather than fewer of them.
+                return
+
+            process.terminate()
+            process.join()
+            self.processes[idx] = replacement
+
+
+def build_config(host: str, port: int, workers: int) -> uvicorn.Config:
+    return uvicorn.Config(
+        APP,
+        host=host,
+        port=port,
+        workers=workers,
+        loop="uvloop" if _installed("uvloop") else "asyncio",
+        http="httptools" if _installed("httptools") else "h11",
+        backlog=settings.SERVE_BACKLOG,
+        timeout_keep_alive=settings.SERVE_KEEPALIVE,
+        limit_concurrency=settings.SERVE_LIMIT_CONCURRENCY or None,
+        timeout_graceful_shutdown=settings.SERVE_GRACEFUL_TIMEOUT,
+        access_log=settings.SERVE_ACCESS_LOG,
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default=settings.APP_HOST)
+    parser.add_argument("--port", type=int, default=settings.EXTERNAL_PORT)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=settings.SERVE_WORKERS,
+        help="worker processes, 0 for one per available CPU "
+        f"(default: {settings.SERVE_WORKERS})",
+    )
+    parser.add_argument(
+        "--migrate",
+        action="store_true",
+        help="run the alembic migrations before serving",
+    )
+    parser.add_argument(
+        "--wait-db",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="wait until the database serves queries before starting",
+    )
+    args = parser.parse_args()
+
+    workers = args.workers or available_cpus()
+    config = build_config(host=args.host, port=args.port, workers=workers)
+
+    if args.wait_db or args.migrate:
+        asyncio.run(wait_for_db(timeout=settings.SERVE_DB_WAIT_TIMEOUT))
+    if args.migrate:
+        asyncio.run(migrate())
+
+    # Workers are spawned, not forked, so this doesn't share the imported
+    # app with them; it makes import errors fail the parent right away
+    # instead of in a worker restart loop.
+    importlib.import_module(APP.partition(":")[0])
+
+    logger.info(
+        f"Serving {APP} on {args.host}:{args.port} with {workers} workers "
+        f"(loop={config.loop}, http={config.http})"
+    )
+
+    ready = multiprocessing.get_context("spawn").Event()
+    server = Server(config=config, ready=ready)
+
+    sock = config.bind_socket()
+    supervisor = Supervisor(config, target=server.run, sockets=[sock], ready=ready)
+    try:
+        supervisor.run()
+    except KeyboardInterrupt:
+        pass
+
+    if supervisor.failed:
+        return 3  # uvicorn's startup failure exit code
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
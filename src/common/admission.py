@@ -0,0 +1,128 @@
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+import settings
+from src.api.exceptions import ServiceOverloadedException, TooManyRequestsException
+
+
+class AdmissionLimiter:
+    """Concurrency limit with a bounded, deadline-aware FIFO queue.
+
+    A request that would have to queue is admitted only if its predicted
+    wait (queue position * EWMA service time / concurrency) fits into
+    `max_wait`; otherwise it's rejected right away instead of timing out
+    later on the DB pool.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int,
+        max_queue: int,
+        max_wait: float,
+        initial_service_time: float = 0.05,
+    ) -> None:
+        self.name = name
+        self._max_concurrency = max_concurrency
+        self._max_queue = max_queue
+        self._max_wait = max_wait
+        self._service_time = initial_service_time
+        self._active = 0
+        self._waiters: deque[asyncio.Future[None]] = deque()
+        self.rejected = 0
+
+    def predicted_wait(self) -> float:
+        position = len(self._waiters) + 1
+        return position * self._service_time / self._max_concurrency
+
+    def _retry_after(self, wait: float) -> str:
+        return str(max(1, math.ceil(wait)))
+
+    def _release(self) -> None:
+        if self._waiters:
+            # Hand the slot over directly, `_active` stays the same.
+            self._waiters.popleft().set_result(None)
+        else:
+            self._active -= 1
+
+    async def _wait_for_slot(self) -> None:
+        if len(self._waiters) >= self._max_queue:
+            self.rejected += 1
+            raise TooManyRequestsException(
+                retry_after=self._retry_after(self.predicted_wait()),
+            )
+
+        predicted_wait = self.predicted_wait()
+        if predicted_wait > self._max_wait:
+            self.rejected += 1
+            raise ServiceOverloadedException(
+                retry_after=self._retry_after(predicted_wait),
+            )
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+
+        try:
+            await asyncio.wait({waiter}, timeout=self._max_wait)
+        except asyncio.CancelledError:
+            if waiter.done():
+                self._release()
+            else:
+                self._waiters.remove(waiter)
+            raise
+
+        if not waiter.done():
+            self._waiters.remove(waiter)
+            self.rejected += 1
+            raise ServiceOverloadedException(
+                retry_after=self._retry_after(self.predicted_wait()),
+            )
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[None]:
+        if self._active < self._max_concurrency and not self._waiters:
+            self._active += 1
+        else:
+            await self._wait_for_slot()
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self._service_time = 0.8 * self._service_time + 0.2 * elapsed
+            self._release()
+
+    def stats(self) -> dict[str, int | float]:
+        return {
+            "active": self._active,
+            "queued": len(self._waiters),
+            "service_time": round(self._service_time, 4),
+            "rejected": self.rejected,
+        }
+
+
+admission_limiters = {
+    "read": AdmissionLimiter(
+        name="read",
+        max_concurrency=settings.ADMISSION_READ_CONCURRENCY,
+        max_queue=settings.ADMISSION_READ_QUEUE,
+        max_wait=settings.ADMISSION_READ_MAX_WAIT,
+    ),
+    "write": AdmissionLimiter(
+        name="write",
+        max_concurrency=settings.ADMISSION_WRITE_CONCURRENCY,
+        max_queue=settings.ADMISSION_WRITE_QUEUE,
+        max_wait=settings.ADMISSION_WRITE_MAX_WAIT,
+    ),
+    "internal": AdmissionLimiter(
+        name="internal",
+        max_concurrency=settings.ADMISSION_INTERNAL_CONCURRENCY,
+        max_queue=settings.ADMISSION_INTERNAL_QUEUE,
+        max_wait=settings.ADMISSION_INTERNAL_MAX_WAIT,
+    ),
+}
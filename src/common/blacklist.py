@@ -0,0 +1,486 @@
+import math
+import zlib
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from ipaddress import IPv4Network, IPv6Network
+from typing import Any, Iterable, Iterator, Literal, Sequence
+
+import settings
+from src.common.blacklist_events import EventOp
+from src.common.expiry import ExpiryHeap
+from src.common.ip_validation import parse_address
+
+# Feed lines per chunk; a change renders one chunk again, not the feed.
+FEED_CHUNK_SIZE = 1024
+
+
+@dataclass(frozen=True, slots=True)
+class BlacklistSnapshot:
+    ips: tuple[str, ...]
+    version: int
+    built_at: float  # unix time the data was read from the DB
+    rendered: str = field(repr=False)
+
+
+def render_blacklist(ips: tuple[str, ...]) -> str:
+    return "\n".join(ips) + "\n" if ips else ""
+
+
+@dataclass(frozen=True, slots=True)
+class FeedFilter:
+    family: Literal[4, 6] | None = None
+    prefix: IPv4Network | IPv6Network | None = None
+    shard_index: int = 0
+    shard_count: int = 1
+    shard_by: Literal["range", "hash"] = "range"
+
+
+def _sorted_entries(ips: Iterable[str]) -> dict[int, list[tuple[int, str]]]:
+    """(value, normalized ip) per family, sorted; unparsable IPs are skipped."""
+    entries: dict[int, list[tuple[int, str]]] = {4: [], 6: []}
+    for ip in ips:
+        try:
+            parsed = parse_address(ip)
+        except ValueError:
+            continue
+        entries[parsed.version].append((parsed.value, parsed.normalized))
+
+    for items in entries.values():
+        items.sort()
+    return entries
+
+
+def _splice(
+    values: Any,  # list[int] or a packed array, returned as the same type
+    ips: list[str],
+    removed: Iterable[int],
+    added: list[tuple[int, str]],
+) -> tuple[Any, list[str]]:
+    """Copies of the sorted `values`/`ips` columns without the `removed`
+    values and with the sorted `added` entries merged in. The runs between
+    edits are copied as slices, nothing is compared or re-sorted."""
+    size = len(values)
+    edits: list[tuple[int, int, int, str]] = []
+
+    for value, ip in added:
+        pos = bisect_left(values, value)
+        if pos == size or values[pos] != value:
+            edits.append((pos, 0, value, ip))
+
+    for value in removed:
+        pos = bisect_left(values, value)
+        if pos < size and values[pos] == value:
+            edits.append((pos, 1, value, ""))
+
+    # Inserts before the removal at the same position: they go in front
+    # of the value being removed.
+    edits.sort()
+
+    new_values = values[:0]
+    new_ips: list[str] = []
+    start = 0
+    for pos, remove, value, ip in edits:
+        new_values += values[start:pos]
+        new_ips += ips[start:pos]
+        if remove:
+            start = pos + 1
+        else:
+            new_values.append(value)
+            new_ips.append(ip)
+            start = pos
+
+    new_values += values[start:]
+    new_ips += ips[start:]
+    return new_values, new_ips
+
+
+class BlacklistIndex:
+    """Address-sorted view of one blacklist version.
+
+    Family and prefix filters are bisect slices of the per-family sorted
+    arrays, range shards are slices of that selection; rendered feeds are
+    cached per filter for the lifetime of the index. IPv4 values are kept
+    in a packed u32 array, which is also what bulk lookups search.
+
+    An index is never modified once built: bulk lookups search it from
+    worker threads. `updated` derives the next version from it.
+    """
+
+    def __init__(self, ips: Iterable[str], cache_size: int) -> None:
+        self._values: dict[int, Sequence[int]] = {}
+        self._ips: dict[int, list[str]] = {}
+        for version, items in _sorted_entries(ips).items():
+            self._values[version] = [value for value, _ in items]
+            self._ips[version] = [ip for _, ip in items]
+        self._values[4] = array("I", self._values[4])
+
+        self._cache_size = cache_size
+        self._rendered: OrderedDict[FeedFilter, str] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._ips[4]) + len(self._ips[6])
+
+    def updated(
+        self,
+        removed: Iterable[str],
+        added: Iterable[str],
+    ) -> "BlacklistIndex":
+        """A new index with `removed` taken out and `added` merged in.
+
+        Only the changed IPs are parsed; the sorted arrays of this index
+        are spliced rather than built and sorted again.
+        """
+        index = BlacklistIndex((), self._cache_size)
+        removed_entries = _sorted_entries(removed)
+        added_entries = _sorted_entries(added)
+
+        for version in (4, 6):
+            index._values[version], index._ips[version] = _splice(
+                self._values[version],
+                self._ips[version],
+                removed=[value for value, _ in removed_entries[version]],
+                added=added_entries[version],
+            )
+
+        return index
+
+    def _select(self, feed_filter: FeedFilter) -> list[str]:
+        prefix = feed_filter.prefix
+
+        if prefix is not None:
+            version = prefix.version
+            if feed_filter.family not in (None, version):
+                return []
+            values = self._values[version]
+            lower = bisect_left(values, int(prefix.network_address))
+            upper = bisect_right(values, int(prefix.broadcast_address))
+            return self._ips[version][lower:upper]
+
+        if feed_filter.family is not None:
+            return self._ips[feed_filter.family]
+
+        return self._ips[4] + self._ips[6]
+
+    def match(self, version: int, values: Iterable[int]) -> list[int]:
+        """Positions of the blacklisted `values`, deduplicated, in the
+        order they were given."""
+        sorted_values = self._values[version]
+        size = len(sorted_values)
+        positions: list[int] = []
+        seen: set[int] = set()
+
+        for value in values:
+            pos = bisect_left(sorted_values, value)
+            if pos < size and sorted_values[pos] == value and pos not in seen:
+                seen.add(pos)
+                positions.append(pos)
+
+        return positions
+
+    def value_at(self, version: int, pos: int) -> int:
+        return self._values[version][pos]
+
+    def ip_at(self, version: int, pos: int) -> str:
+        return self._ips[version][pos]
+
+    def _shard(self, ips: list[str], feed_filter: FeedFilter) -> list[str]:
+        count, index = feed_filter.shard_count, feed_filter.shard_index
+        if count == 1:
+            return ips
+
+        if feed_filter.shard_by == "range":
+            return ips[len(ips) * index // count : len(ips) * (index + 1) // count]
+
+        # Hash shards are stable across snapshot versions, but need a pass.
+        return [ip for ip in ips if zlib.crc32(ip.encode()) % count == index]
+
+    def render(self, feed_filter: FeedFilter) -> str:
+        rendered = self._rendered.get(feed_filter)
+
+        if rendered is None:
+            ips = self._shard(self._select(feed_filter), feed_filter)
+            rendered = "\n".join(ips) + "\n" if ips else ""
+            self._rendered[feed_filter] = rendered
+            if len(self._rendered) > self._cache_size:
+                self._rendered.popitem(last=False)
+        else:
+            self._rendered.move_to_end(feed_filter)
+
+        return rendered
+
+
+class _FeedChunk:
+    """A run of consecutive feed lines and their rendered text."""
+
+    __slots__ = ("ips", "_text")
+
+    def __init__(self, ips: Iterable[str] = ()) -> None:
+        # Oldest first, so the most recently blacklisted IP is appended.
+        self.ips: dict[str, None] = dict.fromkeys(ips)
+        self._text: str | None = None
+
+    def add(self, ip: str) -> None:
+        self.ips[ip] = None
+        self._text = None
+
+    def discard(self, ip: str) -> None:
+        del self.ips[ip]
+        self._text = None
+
+    def text(self) -> str:
+        if self._text is None:
+            self._text = "".join(f"{ip}\n" for ip in reversed(self.ips))
+        return self._text
+
+
+class BlacklistStore:
+    """Holds the blacklist of this process.
+
+    It's loaded in full once (`replace`, or `restore` from disk) and then
+    kept current by change events (`apply`) and by dropping entries at
+    their `expires_at` (`expire`), never reloaded on a timer.
+
+    A change costs O(log n) here, whatever the size of the blacklist. The
+    feed is kept in chunks and a read renders only the chunks that changed
+    since the previous one; the sorted index is spliced from the previous
+    version with the IPs that changed since, on the next lookup.
+
+    The version moves with every change, so it can be used to skip
+    redundant work (persisting) downstream.
+    """
+
+    def __init__(self) -> None:
+        self._version = 0
+        self._built_at: float | None = None
+        self._chunks: list[_FeedChunk] = []  # newest first
+        self._chunk_of: dict[str, _FeedChunk] = {}
+        self._expiry = ExpiryHeap()
+        self._rendered: str | None = None
+        self._snapshot: BlacklistSnapshot | None = None
+        self._index: BlacklistIndex | None = None
+        # What changed since `_index` was built.
+        self._index_added: set[str] = set()
+        self._index_removed: set[str] = set()
+        # Changes applied while a load is in flight, replayed on top of it.
+        self._held: list[tuple[EventOp, str, float]] | None = None
+
+    def __len__(self) -> int:
+        return len(self._chunk_of)
+
+    @property
+    def loaded(self) -> bool:
+        return self._built_at is not None
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    @property
+    def built_at(self) -> float | None:
+        """Unix time of the last full load (from the DB or from disk)."""
+        return self._built_at
+
+    def ips(self) -> Iterator[str]:
+        """The IPs in feed order, most recently blacklisted first."""
+        for chunk in self._chunks:
+            yield from reversed(chunk.ips)
+
+    def rendered(self) -> str:
+        """The unfiltered feed, one IP per line, in feed order."""
+        if self._rendered is None:
+            self._chunks = [chunk for chunk in self._chunks if chunk.ips]
+            self._rendered = "".join(chunk.text() for chunk in self._chunks)
+        return self._rendered
+
+    @property
+    def snapshot(self) -> BlacklistSnapshot | None:
+        """The current version as a self-contained snapshot, materialized
+        once per version; for persisting and full resyncs, not reads."""
+        if self._built_at is None:
+            return None
+
+        if self._snapshot is None:
+            self._snapshot = BlacklistSnapshot(
+                ips=tuple(self.ips()),
+                version=self._version,
+                built_at=self._built_at,
+                rendered=self.rendered(),
+            )
+        return self._snapshot
+
+    def index(self) -> BlacklistIndex:
+        """Address-sorted index of the current version."""
+        if self._index is None:
+            self._index = BlacklistIndex(
+                self._chunk_of,
+                cache_size=settings.BLACKLIST_FEED_CACHE_SIZE,
+            )
+        elif self._index_added or self._index_removed:
+            self._index = self._index.updated(
+                removed=self._index_removed,
+                added=self._index_added,
+            )
+
+        self._index_added, self._index_removed = set(), set()
+        return self._index
+
+    def expiries(self) -> dict[str, float]:
+        """expires_at (epoch seconds) of every IP that expires."""
+        return self._expiry.deadlines()
+
+    def _changed(self) -> None:
+        self._version += 1
+        self._rendered = None
+        self._snapshot = None
+
+    def _track_index(self, ip: str, added: bool) -> None:
+        if self._index is None:
+            return
+
+        if added:
+            if ip in self._index_removed:
+                self._index_removed.discard(ip)
+            else:
+                self._index_added.add(ip)
+        elif ip in self._index_added:
+            self._index_added.discard(ip)
+        else:
+            self._index_removed.add(ip)
+
+        # Past a quarter of the IPs a fresh build is cheaper than splicing.
+        if len(self._index_added) + len(self._index_removed) > len(self) // 4 + 1:
+            self._index = None
+            self._index_added, self._index_removed = set(), set()
+
+    def _add(self, ip: str, expires_at: float) -> bool:
+        chunk = self._chunk_of.get(ip)
+        if chunk is not None:
+            # Blacklisted again: it moves to the top of the feed.
+            chunk.discard(ip)
+
+        if not self._chunks or len(self._chunks[0].ips) >= FEED_CHUNK_SIZE:
+            self._chunks.insert(0, _FeedChunk())
+        head = self._chunks[0]
+        head.add(ip)
+        self._chunk_of[ip] = head
+        self._expiry.schedule(ip, expires_at)
+
+        if chunk is None:
+            self._track_index(ip, added=True)
+        return chunk is None
+
+    def _remove(self, ip: str) -> bool:
+        chunk = self._chunk_of.pop(ip, None)
+        if chunk is None:
+            return False
+
+        chunk.discard(ip)
+        self._expiry.cancel(ip)
+        self._track_index(ip, added=False)
+        return True
+
+    def apply(self, op: EventOp, ip: str, expires_at: float = math.inf) -> bool:
+        """Apply one change event; returns whether the set of IPs changed.
+
+        While a load is in flight (`hold_changes`) the change is applied
+        and also kept, to be replayed on top of the loaded data.
+        """
+        if self._held is not None:
+            self._held.append((op, ip, expires_at))
+
+        if op == "add":
+            chunk = self._chunk_of.get(ip)
+            if chunk is not None and next(reversed(chunk.ips)) == ip and (
+                chunk is self._chunks[0]
+            ):
+                # Already on top, e.g. a local write echoed back by the DB.
+                self._expiry.schedule(ip, expires_at)
+                return False
+
+            changed = self._add(ip, expires_at)
+            self._changed()
+        else:
+            changed = self._remove(ip)
+            if changed:
+                self._changed()
+        return changed
+
+    def expire(self, now: float) -> list[str]:
+        """Drop the entries whose expiry is due; returns them."""
+        expired = [ip for ip in self._expiry.pop_due(now) if self._remove(ip)]
+        if expired:
+            self._changed()
+        return expired
+
+    def hold_changes(self) -> None:
+        """Keep the changes applied from now on until the load that's
+        starting is installed by `replace` (or abandoned, `release_changes`):
+        they may have committed after the load's query ran."""
+        self._held = []
+
+    def release_changes(self) -> None:
+        self._held = None
+
+    def _install(self, ips: list[str], expires_at: dict[str, float]) -> None:
+        self._chunks = [
+            _FeedChunk(reversed(ips[start : start + FEED_CHUNK_SIZE]))
+            for start in range(0, len(ips), FEED_CHUNK_SIZE)
+        ]
+        self._chunk_of = {ip: chunk for chunk in self._chunks for ip in chunk.ips}
+        self._expiry.reset(expires_at)
+        self._index = None
+        self._index_added, self._index_removed = set(), set()
+        self._changed()
+
+    def replace(
+        self,
+        ips: list[str],
+        built_at: float,
+        expires_at: dict[str, float] | None = None,
+    ) -> None:
+        """Install a full load, `ips` in feed order, then replay the changes
+        held since `hold_changes`. `expires_at` (epoch seconds per IP)
+        replaces the whole expiry schedule."""
+        held, self._held = self._held or [], None
+
+        if self.loaded and len(ips) == len(self) and ips == list(self.ips()):
+            # Unchanged: keep the version, the rendered chunks and the index.
+            self._expiry.reset(expires_at or {})
+        else:
+            self._install(ips, expires_at or {})
+        self._built_at = built_at
+
+        for op, ip, at in held:
+            self.apply(op, ip, at)
+
+    def restore(
+        self,
+        snapshot: BlacklistSnapshot,
+        expires_at: dict[str, float],
+        now: float,
+    ) -> BlacklistSnapshot | None:
+        """Install a snapshot loaded from disk, without the entries that
+        expired while the process was down. It's served as is until a DB
+        load replaces it; its expiries keep being applied meanwhile.
+
+        Returns the installed snapshot, None if a newer one is in place.
+        """
+        if self.loaded and snapshot.version <= self._version:
+            return None
+
+        ips = [ip for ip in snapshot.ips if expires_at.get(ip, math.inf) > now]
+        self._install(ips, {ip: expires_at[ip] for ip in ips if ip in expires_at})
+        self._built_at = snapshot.built_at
+
+        if len(ips) == len(snapshot.ips):
+            self._version = snapshot.version
+            self._snapshot = snapshot
+            self._rendered = snapshot.rendered
+        else:
+            self._version = snapshot.version + 1
+        return self.snapshot
+
+
+blacklist_store = BlacklistStore()
@@ -0,0 +1,222 @@
+import asyncio
+import secrets
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Iterable, Literal
+
+import settings
+
+EventOp = Literal["add", "remove"]
+
+
+@dataclass(frozen=True, slots=True)
+class BlacklistEvent:
+    seq: int
+    op: EventOp
+    ip: str
+
+
+class SlowConsumerError(Exception):
+    pass
+
+
+class SubscriptionClosedError(Exception):
+    """The process is shutting down; the client should reconnect."""
+
+
+class Subscription:
+    """One subscriber's bounded buffer.
+
+    The hub never waits on a subscriber: when the buffer is full the
+    subscription is closed and the client is expected to reconnect with its
+    last cursor.
+    """
+
+    def __init__(self, hub: "BlacklistEventHub", max_buffer: int) -> None:
+        self._hub = hub
+        # None is the end-of-stream marker queued by `drain`.
+        self._queue: asyncio.Queue[BlacklistEvent | None] = asyncio.Queue(max_buffer)
+        self.overflowed = False
+        self.draining = False
+
+    def push(self, event: BlacklistEvent) -> None:
+        if self.overflowed:
+            return
+
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+            self._hub.slow_consumers += 1
+            self._hub.unsubscribe(self)
+
+    async def next(self, timeout: float) -> BlacklistEvent | None:
+        """Next event, or None if nothing happened within `timeout`."""
+        if self.overflowed:
+            raise SlowConsumerError()
+        if self.draining and self._queue.empty():
+            raise SubscriptionClosedError()
+
+        try:
+            event = await asyncio.wait_for(self._queue.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+
+        if event is None:
+            raise SubscriptionClosedError()
+        return event
+
+    def drain(self) -> None:
+        """Stop receiving events; the ones already buffered are still
+        delivered before `next` raises SubscriptionClosedError."""
+        self._hub.unsubscribe(self)
+        self.draining = True
+        try:
+            # Wakes a waiting `next`; a full queue has no waiter to wake.
+            self._queue.put_nowait(None)
+        except asyncio.QueueFull:
+            pass
+
+    def close(self) -> None:
+        self._hub.unsubscribe(self)
+
+
+class BlacklistEventHub:
+    """Add/remove stream over the set of blacklisted IPs of this process.
+
+    The hub keeps its own view of the set so duplicate notifications (a
+    write published directly and echoed back by the DB's change event) don't
+    produce duplicate events. Cursors are `<epoch>:<seq>`; a cursor from
+    another process or one that fell out of the replay log gets a full
+    snapshot instead of a delta.
+    """
+
+    def __init__(self, log_size: int, max_buffer: int) -> None:
+        self.epoch = secrets.token_hex(4)
+        self._max_buffer = max_buffer
+        self._log: deque[BlacklistEvent] = deque(maxlen=log_size)
+        self._ips: set[str] | None = None
+        self._synced_ips: tuple[str, ...] | None = None
+        self._subscribers: set[Subscription] = set()
+        self.seq = 0
+        self.slow_consumers = 0
+        self.closing = False
+
+    @property
+    def ready(self) -> bool:
+        return self._ips is not None
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    def cursor(self, seq: int | None = None) -> str:
+        return f"{self.epoch}:{self.seq if seq is None else seq}"
+
+    def _emit(self, op: EventOp, ip: str) -> None:
+        self.seq += 1
+        event = BlacklistEvent(seq=self.seq, op=op, ip=ip)
+        self._log.append(event)
+        for subscription in list(self._subscribers):
+            subscription.push(event)
+
+    def publish(self, op: EventOp, ips: Iterable[str]) -> None:
+        if self._ips is None:
+            # Nothing to diff against yet; the first sync carries these.
+            return
+
+        for ip in ips:
+            if op == "add" and ip not in self._ips:
+                self._ips.add(ip)
+                self._emit(op, ip)
+            elif op == "remove" and ip in self._ips:
+                self._ips.discard(ip)
+                self._emit(op, ip)
+
+    def sync(self, ips: tuple[str, ...]) -> None:
+        """Reconcile with a full load; picks up whatever changed while the
+        process wasn't receiving change events."""
+        if ips is self._synced_ips:
+            return
+        self._synced_ips = ips
+
+        if self._ips is None:
+            self._ips = set(ips)
+            return
+
+        current = set(ips)
+        self.publish("remove", sorted(self._ips - current))
+        self.publish("add", sorted(current - self._ips))
+
+    def _replay(self, cursor: str | None) -> list[BlacklistEvent] | None:
+        if cursor is None:
+            return None
+
+        epoch, _, seq = cursor.partition(":")
+        if epoch != self.epoch or not seq.isdigit():
+            return None
+
+        after = int(seq)
+        if after > self.seq:
+            return None
+        if after == self.seq:
+            return []
+
+        oldest = self._log[0].seq if self._log else self.seq + 1
+        if after + 1 < oldest:
+            return None
+
+        return [event for event in self._log if event.seq > after]
+
+    def subscribe(
+        self,
+        cursor: str | None = None,
+    ) -> tuple[Subscription, dict[str, Any] | list[BlacklistEvent]]:
+        """Register a subscriber and return what it must be sent first:
+        either the events after `cursor` or a full snapshot message."""
+        assert self._ips is not None
+
+        subscription = Subscription(self, self._max_buffer)
+        self._subscribers.add(subscription)
+        if self.closing:
+            subscription.drain()
+
+        replay = self._replay(cursor)
+        if replay is not None:
+            return subscription, replay
+
+        return subscription, {
+            "type": "snapshot",
+            "cursor": self.cursor(),
+            "ips": sorted(self._ips),
+        }
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._subscribers.discard(subscription)
+
+    def close_all(self) -> None:
+        """End every stream of this process with its buffered events
+        delivered, so clients resume elsewhere from their last cursor
+        instead of being cut off mid-stream by a worker shutdown."""
+        self.closing = True
+        for subscription in list(self._subscribers):
+            subscription.drain()
+
+    def event_message(self, event: BlacklistEvent) -> dict[str, Any]:
+        return {"type": event.op, "cursor": self.cursor(event.seq), "ip": event.ip}
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "cursor": self.cursor(),
+            "subscribers": self.subscribers,
+            "log_size": len(self._log),
+            "slow_consumers": self.slow_consumers,
+            "closing": self.closing,
+        }
+
+
+blacklist_events = BlacklistEventHub(
+    log_size=settings.BLACKLIST_STREAM_LOG_SIZE,
+    max_buffer=settings.BLACKLIST_STREAM_BUFFER,
+)
@@ -0,0 +1,119 @@
+import sys
+from array import array
+from dataclasses import dataclass
+from typing import Literal
+
+from src.common.blacklist import BlacklistIndex
+from src.common.ip_validation import parse_address
+
+# Binary bodies are bare concatenated big-endian addresses of one family:
+# 4 bytes each for IPv4, 16 bytes each for IPv6.
+PACKED_SIZE = {4: 4, 6: 16}
+# Longest textual address (IPv4-mapped IPv6) plus CRLF, with slack for
+# surrounding whitespace.
+MAX_TEXT_LINE = 64
+
+
+def _uint32_typecode() -> str:
+    # array typecodes are C types whose width varies by platform.
+    for typecode in ("I", "L"):
+        if array(typecode).itemsize == 4:
+            return typecode
+    raise ImportError("no 32-bit unsigned array typecode on this platform")
+
+
+_UINT32 = _uint32_typecode()
+
+
+@dataclass(frozen=True, slots=True)
+class BulkLookupResult:
+    body: bytes
+    total: int
+    matched: int
+    invalid: int
+
+
+def max_body_size(max_ips: int, family: Literal[4, 6] | None) -> int:
+    """Largest body that can hold `max_ips` addresses: text when `family`
+    is None, packed otherwise."""
+    return max_ips * (MAX_TEXT_LINE if family is None else PACKED_SIZE[family])
+
+
+def parse_text(body: bytes) -> tuple[list[int], list[int], int]:
+    """Split a newline separated body into IPv4 and IPv6 integers; blank
+    lines are skipped, malformed ones counted."""
+    values: dict[int, list[int]] = {4: [], 6: []}
+    invalid = 0
+
+    for line in body.decode("ascii", errors="replace").splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            parsed = parse_address(line)
+        except ValueError:
+            invalid += 1
+            continue
+        values[parsed.version].append(parsed.value)
+
+    return values[4], values[6], invalid
+
+
+def unpack(body: bytes, family: Literal[4, 6]) -> list[int] | array:
+    size = PACKED_SIZE[family]
+    if len(body) % size:
+        raise ValueError(f"body length must be a multiple of {size} bytes")
+
+    if family == 4:
+        values = array(_UINT32)
+        values.frombytes(body)
+        if sys.byteorder == "little":
+            values.byteswap()
+        return values
+
+    return [
+        int.from_bytes(body[offset : offset + size], "big")
+        for offset in range(0, len(body), size)
+    ]
+
+
+def pack(values: list[int], family: Literal[4, 6]) -> bytes:
+    if family == 4:
+        packed = array(_UINT32, values)
+        if sys.byteorder == "little":
+            packed.byteswap()
+        return packed.tobytes()
+
+    return b"".join(value.to_bytes(16, "big") for value in values)
+
+
+def lookup_text(index: BlacklistIndex, body: bytes) -> BulkLookupResult:
+    v4, v6, invalid = parse_text(body)
+    matches = [
+        index.ip_at(version, pos)
+        for version, values in ((4, v4), (6, v6))
+        for pos in index.match(version, values)
+    ]
+
+    return BulkLookupResult(
+        body="".join(f"{ip}\n" for ip in matches).encode(),
+        total=len(v4) + len(v6) + invalid,
+        matched=len(matches),
+        invalid=invalid,
+    )
+
+
+def lookup_packed(
+    index: BlacklistIndex,
+    body: bytes,
+    family: Literal[4, 6],
+) -> BulkLookupResult:
+    values = unpack(body, family)
+    matches = [index.value_at(family, pos) for pos in index.match(family, values)]
+
+    return BulkLookupResult(
+        body=pack(matches, family),
+        total=len(values),
+        matched=len(matches),
+        invalid=0,
+    )
@@ -7,8 +7,34 @@ from src.adapters.adapters_manager import AdaptersManager
 from src.bl.bl_manager import BLManager
 from src.db.managers.db_manager import DBManager, init_db_manager
 
+_db_manager: DBManager | None = None
+
+
+async def setup_db_manager() -> DBManager:
+    global _db_manager
+
+    if _db_manager is None:
+        _db_manager = await init_db_manager(
+            db_connection_url=settings.DATABASE_URL,
+            run_migrations=False,
+        )
+
+    return _db_manager
+
+
+async def shutdown_db_manager() -> None:
+    global _db_manager
+
+    if _db_manager is not None:
+        await _db_manager.close()
+        _db_manager = None
+
 
 async def get_db_manager() -> AsyncGenerator[DBManager, None]:
+    if _db_manager is not None:
+        yield _db_manager
+        return
+
     db_manager = await init_db_manager(
         db_connection_url=settings.DATABASE_URL,
         run_migrations=False,
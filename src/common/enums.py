@@ -8,3 +8,15 @@ class IPStatus(str, Enum):
     MARKED_FOR_DELETION = (
         "EXPIRED"  # successfully reached cooling period end, to be deleted
     )
+
+
+class AddressFamily(int, Enum):
+    IPV4 = 4
+    IPV6 = 6
+
+
+class IPEventType(str, Enum):
+    ADDED = "ADDED"
+    REBLACKLISTED = "REBLACKLISTED"
+    ARCHIVED = "ARCHIVED"
+    EXPIRED = "EXPIRED"
@@ -0,0 +1,71 @@
+import heapq
+import math
+from datetime import datetime
+
+
+def expiry_timestamp(expires_at: datetime | None) -> float:
+    """Epoch seconds of a naive local `expires_at`; inf for "never" (NULL
+    or Postgres 'infinity', which arrives as datetime.max)."""
+    if expires_at is None or expires_at == datetime.max:
+        return math.inf
+
+    try:
+        return expires_at.timestamp()
+    except (OverflowError, OSError, ValueError):
+        return math.inf
+
+
+class ExpiryHeap:
+    """Min-heap of deadlines with lazy invalidation.
+
+    Rescheduling or cancelling a key leaves its old heap entry behind; it
+    is skipped when it surfaces, so a tick costs O(k log n) for the k keys
+    that are due and nothing else.
+    """
+
+    def __init__(self) -> None:
+        self._heap: list[tuple[float, str]] = []
+        self._deadlines: dict[str, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    def reset(self, deadlines: dict[str, float]) -> None:
+        self._deadlines = {
+            key: at for key, at in deadlines.items() if at != math.inf
+        }
+        self._heap = [(at, key) for key, at in self._deadlines.items()]
+        heapq.heapify(self._heap)
+
+    def deadlines(self) -> dict[str, float]:
+        """Copy of the pending deadlines by key."""
+        return dict(self._deadlines)
+
+    def schedule(self, key: str, at: float) -> None:
+        if at == math.inf:
+            self.cancel(key)
+            return
+
+        self._deadlines[key] = at
+        heapq.heappush(self._heap, (at, key))
+
+    def cancel(self, key: str) -> None:
+        self._deadlines.pop(key, None)
+
+    def next_deadline(self) -> float | None:
+        heap = self._heap
+        while heap and self._deadlines.get(heap[0][1]) != heap[0][0]:
+            heapq.heappop(heap)
+        return heap[0][0] if heap else None
+
+    def pop_due(self, now: float) -> list[str]:
+        heap = self._heap
+        due: list[str] = []
+
+        while heap and heap[0][0] <= now:
+            at, key = heapq.heappop(heap)
+            if self._deadlines.get(key) == at:
+                del self._deadlines[key]
+                due.append(key)
+
+        return due
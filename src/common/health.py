@@ -0,0 +1,89 @@
+import asyncio
+import time
+from typing import Any
+
+import settings
+from src.common.admission import admission_limiters
+from src.common.blacklist import blacklist_store
+from src.db.managers.db_manager import DBManager
+
+
+class HealthMonitor:
+    """Process-wide readiness state.
+
+    The DB probe result is cached for `ttl` seconds and concurrent callers
+    share one in-flight probe, so orchestrator polling never piles up on
+    the connection pool.
+    """
+
+    def __init__(self, ttl: float, timeout: float) -> None:
+        self._ttl = ttl
+        self._timeout = timeout
+        self._lock = asyncio.Lock()
+        self._db_ok = False
+        self._probed_at: float | None = None
+        self._heartbeats: dict[str, tuple[float, float]] = {}
+
+    def heartbeat(self, task: str, interval: float) -> None:
+        """Record that background task `task` (run every `interval` s) ran."""
+        self._heartbeats[task] = (time.monotonic(), interval)
+
+    def blacklist_age(self) -> float | None:
+        """Seconds since the blacklist was last loaded in full; changes are
+        applied as they commit in between."""
+        built_at = blacklist_store.built_at
+        if built_at is None:
+            return None
+        return round(time.time() - built_at, 3)
+
+    def background_lag(self) -> dict[str, float]:
+        now = time.monotonic()
+        return {
+            task: round(max(now - last_run - interval, 0.0), 3)
+            for task, (last_run, interval) in self._heartbeats.items()
+        }
+
+    async def _probe_db(self, db_manager: DBManager) -> bool:
+        if self._probed_at is not None and (
+            time.monotonic() - self._probed_at < self._ttl
+        ):
+            return self._db_ok
+
+        async with self._lock:
+            # Another waiter may have refreshed the result while we queued.
+            if self._probed_at is not None and (
+                time.monotonic() - self._probed_at < self._ttl
+            ):
+                return self._db_ok
+
+            try:
+                self._db_ok = await asyncio.wait_for(
+                    db_manager.healthcheck(),
+                    timeout=self._timeout,
+                )
+            except asyncio.TimeoutError:
+                self._db_ok = False
+
+            self._probed_at = time.monotonic()
+            return self._db_ok
+
+    async def readiness(self, db_manager: DBManager) -> dict[str, Any]:
+        db_ok = await self._probe_db(db_manager)
+
+        return {
+            "ready": db_ok,
+            "database": db_ok,
+            "probe_age": round(time.monotonic() - (self._probed_at or 0.0), 3),
+            "pool": db_manager.pool_status(),
+            "blacklist_age": self.blacklist_age(),
+            "background_lag": self.background_lag(),
+            "admission": {
+                name: limiter.stats() for name, limiter in admission_limiters.items()
+            },
+        }
+
+
+health_monitor = HealthMonitor(
+    ttl=settings.HEALTHCHECK_CACHE_TTL,
+    timeout=settings.HEALTHCHECK_TIMEOUT,
+)
@@ -0,0 +1,205 @@
+import socket
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from ipaddress import IPv4Network, IPv6Network, ip_address
+from typing import Iterable, NamedTuple
+
+# IANA special-purpose address registries: the blocks that are not
+# globally reachable, minus the globally reachable exceptions inside them.
+# The same set `ipaddress` uses for `is_private` on current Pythons, kept
+# here so validation doesn't shift with the interpreter's patch release.
+_PRIVATE_IPV4_NETWORKS = tuple(
+    IPv4Network(net)
+    for net in (
+        "0.0.0.0/8",  # "this network"
+        "10.0.0.0/8",  # private-use
+        "127.0.0.0/8",  # loopback
+        "169.254.0.0/16",  # link-local
+        "172.16.0.0/12",  # private-use
+        "192.0.0.0/24",  # IETF protocol assignments
+        "192.0.0.170/31",  # NAT64/DNS64 discovery
+        "192.0.2.0/24",  # TEST-NET-1
+        "192.168.0.0/16",  # private-use
+        "198.18.0.0/15",  # benchmarking
+        "198.51.100.0/24",  # TEST-NET-2
+        "203.0.113.0/24",  # TEST-NET-3
+        "240.0.0.0/4",  # reserved
+        "255.255.255.255/32",  # limited broadcast
+    )
+)
+_PRIVATE_IPV4_EXCEPTIONS = tuple(
+    IPv4Network(net)
+    for net in (
+        "192.0.0.9/32",  # PCP anycast
+        "192.0.0.10/32",  # TURN anycast
+    )
+)
+_PRIVATE_IPV6_NETWORKS = tuple(
+    IPv6Network(net)
+    for net in (
+        "::1/128",  # loopback
+        "::/128",  # unspecified
+        "64:ff9b:1::/48",  # local-use IPv4/IPv6 translation
+        "100::/64",  # discard-only
+        "2001::/23",  # IETF protocol assignments
+        "2001:db8::/32",  # documentation
+        "2002::/16",  # 6to4
+        "3fff::/20",  # documentation
+        "fc00::/7",  # unique-local
+        "fe80::/10",  # link-local
+    )
+)
+_PRIVATE_IPV6_EXCEPTIONS = tuple(
+    IPv6Network(net)
+    for net in (
+        "2001:1::1/128",  # PCP anycast
+        "2001:1::2/128",  # TURN anycast
+        "2001:3::/32",  # AMT
+        "2001:4:112::/48",  # AS112-v6
+        "2001:20::/28",  # ORCHIDv2
+        "2001:30::/28",  # drone remote ID
+    )
+)
+
+# ::ffff:0:0/96, judged by the embedded IPv4 address.
+_IPV4_MAPPED_PREFIX = 0xFFFF
+
+PRIVATE_IP_ERROR = "Private IPs are disallowed"
+
+
+class _IntervalTable:
+    """Sorted, non-overlapping [start, end] integer ranges with bisect lookup."""
+
+    __slots__ = ("_starts", "_ends")
+
+    def __init__(self, intervals: list[tuple[int, int]]) -> None:
+        merged: list[tuple[int, int]] = []
+        for start, end in sorted(intervals):
+            if merged and start <= merged[-1][1] + 1:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+            else:
+                merged.append((start, end))
+
+        self._starts = [start for start, _ in merged]
+        self._ends = [end for _, end in merged]
+
+    def __contains__(self, value: int) -> bool:
+        idx = bisect_right(self._starts, value) - 1
+        return idx >= 0 and value <= self._ends[idx]
+
+
+def _build_table(
+    networks: Iterable[IPv4Network | IPv6Network],
+    exceptions: Iterable[IPv4Network | IPv6Network],
+) -> _IntervalTable:
+    intervals = [
+        (int(net.network_address), int(net.broadcast_address)) for net in networks
+    ]
+
+    for exc in exceptions:
+        exc_start, exc_end = int(exc.network_address), int(exc.broadcast_address)
+        split: list[tuple[int, int]] = []
+        for start, end in intervals:
+            if exc_end < start or exc_start > end:
+                split.append((start, end))
+                continue
+            if start < exc_start:
+                split.append((start, exc_start - 1))
+            if exc_end < end:
+                split.append((exc_end + 1, end))
+        intervals = split
+
+    return _IntervalTable(intervals)
+
+
+_PRIVATE_IPV4 = _build_table(_PRIVATE_IPV4_NETWORKS, _PRIVATE_IPV4_EXCEPTIONS)
+_PRIVATE_IPV6 = _build_table(_PRIVATE_IPV6_NETWORKS, _PRIVATE_IPV6_EXCEPTIONS)
+
+
+def _is_private(parsed: "ParsedIP") -> bool:
+    if parsed.version == 4:
+        return parsed.value in _PRIVATE_IPV4
+    if parsed.value >> 32 == _IPV4_MAPPED_PREFIX:
+        return parsed.value & 0xFFFFFFFF in _PRIVATE_IPV4
+    return parsed.value in _PRIVATE_IPV6
+
+
+class ParsedIP(NamedTuple):
+    version: int
+    value: int
+    normalized: str
+
+
+class IPValidationError(NamedTuple):
+    index: int
+    value: str
+    reason: str
+
+
+@dataclass(slots=True)
+class BatchValidationResult:
+    valid: list[str] = field(default_factory=list)
+    # How many times each entry of `valid` occurred in the input.
+    occurrences: list[int] = field(default_factory=list)
+    errors: list[IPValidationError] = field(default_factory=list)
+    duplicates: int = 0
+
+
+def parse_address(value: str) -> ParsedIP:
+    """Parse and normalize a single address without any range policy,
+    raising ValueError if it is malformed."""
+    try:
+        # Strict dotted-quad fast path; inet_pton rejects everything
+        # `ip_address` would (leading zeros, short forms, whitespace).
+        packed = socket.inet_pton(socket.AF_INET, value)
+    except (OSError, ValueError):
+        ip = ip_address(value)
+        return ParsedIP(ip.version, int(ip), str(ip))
+
+    return ParsedIP(4, int.from_bytes(packed, "big"), value)
+
+
+def parse_ip(value: str) -> ParsedIP:
+    """Parse and normalize a single address, raising ValueError if it is
+    malformed or falls into a private/reserved range."""
+    parsed = parse_address(value)
+
+    if _is_private(parsed):
+        raise ValueError(PRIVATE_IP_ERROR)
+
+    return parsed
+
+
+def validate_ip(value: str) -> str:
+    return parse_ip(value).normalized
+
+
+def validate_ip_batch(values: Iterable[str]) -> BatchValidationResult:
+    """Validate and normalize a whole batch of addresses in one pass.
+
+    Valid addresses are returned deduplicated in first-seen order; bad
+    entries are collected as per-item errors instead of raising.
+    """
+    result = BatchValidationResult()
+    seen: dict[tuple[int, int], int] = {}
+
+    for index, value in enumerate(values):
+        try:
+            parsed = parse_ip(value)
+        except ValueError as e:
+            result.errors.append(IPValidationError(index, value, str(e)))
+            continue
+
+        key = (parsed.version, parsed.value)
+        position = seen.get(key)
+        if position is not None:
+            result.duplicates += 1
+            result.occurrences[position] += 1
+            continue
+
+        seen[key] = len(result.valid)
+        result.valid.append(parsed.normalized)
+        result.occurrences.append(1)
+
+    return result
+
@@ -0,0 +1,174 @@
+import asyncio
+import gc
+import itertools
+import os
+import resource
+import sys
+import time
+import tracemalloc
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Literal
+
+import settings
+
+GroupBy = Literal["lineno", "filename", "traceback"]
+
+# Allocations made by the profiler itself and by the import machinery.
+_IGNORED = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+@dataclass(slots=True)
+class MemorySnapshot:
+    id: int
+    taken_at: float
+    traced_bytes: int
+    blocks: int
+    snapshot: tracemalloc.Snapshot
+
+
+def rss_bytes() -> int:
+    """Current resident set size; peak RSS where /proc isn't available."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _location(stat: tracemalloc.Statistic | tracemalloc.StatisticDiff) -> str:
+    frame = stat.traceback[0]
+    return f"{frame.filename}:{frame.lineno}"
+
+
+class MemoryProfiler:
+    """tracemalloc snapshots of this process, kept in a bounded ring so
+    they can be compared later.
+
+    Tracing only sees allocations made after it started, so long-running
+    comparisons should start it at boot (MEMORY_TRACING_ENABLED) or well
+    before the first snapshot.
+    """
+
+    def __init__(self, size: int, frames: int) -> None:
+        self._snapshots: deque[MemorySnapshot] = deque(maxlen=size)
+        self._ids = itertools.count(1)
+        self._frames = frames
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self, frames: int | None = None) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames or self._frames)
+
+    def stop(self) -> None:
+        # Snapshots of the old trace aren't comparable with a new one.
+        tracemalloc.stop()
+        self._snapshots.clear()
+
+    async def take(self) -> MemorySnapshot | None:
+        if not tracemalloc.is_tracing():
+            return None
+
+        # Filtering walks every trace; keep it off the event loop.
+        snapshot = await asyncio.to_thread(
+            lambda: tracemalloc.take_snapshot().filter_traces(_IGNORED),
+        )
+        traced_bytes, _ = tracemalloc.get_traced_memory()
+        memory_snapshot = MemorySnapshot(
+            id=next(self._ids),
+            taken_at=time.time(),
+            traced_bytes=traced_bytes,
+            blocks=len(snapshot.traces),
+            snapshot=snapshot,
+        )
+        self._snapshots.append(memory_snapshot)
+        return memory_snapshot
+
+    def snapshots(self) -> list[MemorySnapshot]:
+        """Newest first."""
+        return list(reversed(self._snapshots))
+
+    def get(self, snapshot_id: int) -> MemorySnapshot | None:
+        for snapshot in self._snapshots:
+            if snapshot.id == snapshot_id:
+                return snapshot
+        return None
+
+    async def top(
+        self,
+        snapshot: MemorySnapshot,
+        limit: int,
+        group_by: GroupBy = "lineno",
+    ) -> list[dict[str, Any]]:
+        stats = await asyncio.to_thread(snapshot.snapshot.statistics, group_by)
+        return [
+            {
+                "location": _location(stat),
+                "size": stat.size,
+                "count": stat.count,
+                "traceback": stat.traceback.format() if group_by == "traceback" else None,
+            }
+            for stat in stats[:limit]
+        ]
+
+    async def compare(
+        self,
+        base: MemorySnapshot,
+        snapshot: MemorySnapshot,
+        limit: int,
+        group_by: GroupBy = "lineno",
+    ) -> list[dict[str, Any]]:
+        """Allocation sites sorted by how much they grew since `base`."""
+        stats = await asyncio.to_thread(
+            snapshot.snapshot.compare_to, base.snapshot, group_by,
+        )
+        # compare_to orders by absolute change; shrinking sites aren't leaks.
+        stats.sort(key=lambda stat: stat.size_diff, reverse=True)
+        return [
+            {
+                "location": _location(stat),
+                "size": stat.size,
+                "size_diff": stat.size_diff,
+                "count": stat.count,
+                "count_diff": stat.count_diff,
+                "traceback": stat.traceback.format() if group_by == "traceback" else None,
+            }
+            for stat in stats[:limit]
+        ]
+
+    def stats(self) -> dict[str, Any]:
+        traced_bytes, peak_bytes = tracemalloc.get_traced_memory()
+        try:
+            tasks = len(asyncio.all_tasks())
+        except RuntimeError:  # no running loop
+            tasks = 0
+
+        return {
+            "pid": os.getpid(),
+            "rss_bytes": rss_bytes(),
+            # One pass over the GC-tracked objects; cheap enough for polling
+            # every few seconds, not for every request.
+            "objects": len(gc.get_objects()),
+            "gc_counts": gc.get_count(),
+            "tasks": tasks,
+            "tracing": self.tracing,
+            "traced_bytes": traced_bytes,
+            "traced_peak_bytes": peak_bytes,
+            "tracemalloc_overhead_bytes": tracemalloc.get_tracemalloc_memory(),
+            "snapshots": [snapshot.id for snapshot in self._snapshots],
+        }
+
+
+memory_profiler = MemoryProfiler(
+    size=settings.MEMORY_SNAPSHOT_RING_SIZE,
+    frames=settings.MEMORY_TRACE_FRAMES,
+)
@@ -0,0 +1,113 @@
+import itertools
+import os
+import sys
+import threading
+from collections import Counter, deque
+from dataclasses import dataclass
+
+import settings
+
+
+@dataclass(slots=True)
+class RequestProfile:
+    id: int
+    method: str
+    path: str
+    started_at: float
+    duration: float
+    samples: int
+    collapsed: str
+
+
+class SamplingProfiler:
+    """Samples the stack of one thread (the event loop) from a side thread.
+
+    Stacks are aggregated as flame-graph "collapsed" lines. Since the loop is
+    shared, samples taken while the profiled request awaits may belong to
+    other in-flight requests.
+    """
+
+    def __init__(self, thread_id: int, interval: float) -> None:
+        self._thread_id = thread_id
+        self._interval = interval
+        self._stacks: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run,
+            name="request-profiler",
+            daemon=True,
+        )
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> Counter[str]:
+        """Blocks until the sampler thread is out of its current sample;
+        call it off the event loop."""
+        self._stop.set()
+        self._thread.join()
+        return self._stacks
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._interval):
+            frame = sys._current_frames().get(self._thread_id)
+
+            stack: list[str] = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(
+                    f"{code.co_name} "
+                    f"({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+                )
+                frame = frame.f_back
+
+            if stack:
+                self._stacks[";".join(reversed(stack))] += 1
+
+
+class ProfileStore:
+    """Bounded in-memory ring of the most recent request profiles."""
+
+    def __init__(self, size: int) -> None:
+        self._profiles: deque[RequestProfile] = deque(maxlen=size)
+        self._ids = itertools.count(1)
+
+    def next_id(self) -> int:
+        return next(self._ids)
+
+    def add(
+        self,
+        profile_id: int,
+        method: str,
+        path: str,
+        started_at: float,
+        duration: float,
+        stacks: Counter[str],
+    ) -> RequestProfile:
+        profile = RequestProfile(
+            id=profile_id,
+            method=method,
+            path=path,
+            started_at=started_at,
+            duration=duration,
+            samples=sum(stacks.values()),
+            collapsed="".join(
+                f"{stack} {count}\n" for stack, count in stacks.most_common()
+            ),
+        )
+        self._profiles.append(profile)
+        return profile
+
+    def get(self, profile_id: int) -> RequestProfile | None:
+        for profile in self._profiles:
+            if profile.id == profile_id:
+                return profile
+        return None
+
+    def profiles(self) -> list[RequestProfile]:
+        """Newest first."""
+        return list(reversed(self._profiles))
+
+
+profile_store = ProfileStore(size=settings.PROFILE_RING_SIZE)
+
@@ -1,8 +1,9 @@
 from datetime import datetime
-from ipaddress import ip_address
 
 from pydantic import BaseModel, field_validator
 
+from src.common.ip_validation import validate_ip
+
 
 class IPAddressBase(BaseModel):
     ip: str
@@ -12,9 +13,6 @@ class IPAddressBase(BaseModel):
     @field_validator("ip")
     def validate_ip_address(cls, v: str) -> str:  # noqa: N805
         try:
-            ip = ip_address(address=v)
-            if ip.is_private:
-                raise ValueError("Private IPs are disallowed")
-            return str(ip)
+            return validate_ip(v)
         except ValueError as e:
             raise ValueError(f"Invalid IP address: {e}")
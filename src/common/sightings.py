@@ -0,0 +1,64 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+
+
+@dataclass(slots=True)
+class Sighting:
+    hits: int
+    last_seen: datetime
+
+
+class SightingAggregator:
+    """Counts sightings per IP in memory between periodic flushes.
+
+    `drain` swaps the buffer out atomically (no awaits), so reports keep
+    landing in a fresh buffer while the previous one is written to the DB;
+    a failed flush is merged back with `restore`.
+    """
+
+    def __init__(self, max_pending_ips: int) -> None:
+        self._max_pending_ips = max_pending_ips
+        self._pending: dict[str, Sighting] = {}
+        self.reported = 0
+        self.flushed = 0
+        self.dropped = 0
+
+    def record(self, ip: str, seen_at: datetime, count: int = 1) -> bool:
+        sighting = self._pending.get(ip)
+
+        if sighting is None:
+            if len(self._pending) >= self._max_pending_ips:
+                self.dropped += count
+                return False
+            self._pending[ip] = Sighting(hits=count, last_seen=seen_at)
+        else:
+            sighting.hits += count
+            sighting.last_seen = max(sighting.last_seen, seen_at)
+
+        self.reported += count
+        return True
+
+    def drain(self) -> dict[str, Sighting]:
+        pending, self._pending = self._pending, {}
+        return pending
+
+    def restore(self, batch: dict[str, Sighting]) -> None:
+        for ip, sighting in batch.items():
+            current = self._pending.get(ip)
+            if current is None:
+                self._pending[ip] = sighting
+            else:
+                current.hits += sighting.hits
+                current.last_seen = max(current.last_seen, sighting.last_seen)
+
+    def mark_flushed(self, batch: dict[str, Sighting]) -> None:
+        self.flushed += sum(sighting.hits for sighting in batch.values())
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "pending_ips": len(self._pending),
+            "reported": self.reported,
+            "flushed": self.flushed,
+            "dropped": self.dropped,
+        }
@@ -0,0 +1,202 @@
+import asyncio
+import contextlib
+import fcntl
+import logging
+import math
+import os
+import socket
+import struct
+import tempfile
+import zlib
+from ipaddress import IPv6Address, ip_address
+from typing import Mapping
+
+import settings
+from src.common.blacklist import BlacklistSnapshot, render_blacklist
+
+logger = logging.getLogger(__name__)
+
+# File layout (big-endian):
+#   header  magic "IPBL" | format u16 | snapshot version u64 | built_at f64 | count u32
+#   entries count x (family u8 (4|6) + 4|16 packed address bytes
+#                    + expires_at f64 epoch seconds, inf for never)
+#   trailer crc32 u32 over header + entries
+MAGIC = b"IPBL"
+FORMAT_VERSION = 2
+_HEADER = struct.Struct(">4sHQdI")
+_EXPIRY = struct.Struct(">d")
+_CRC = struct.Struct(">I")
+
+
+class SnapshotFormatError(ValueError):
+    pass
+
+
+def encode_snapshot(
+    snapshot: BlacklistSnapshot,
+    expires_at: Mapping[str, float],
+) -> bytes:
+    chunks = [
+        _HEADER.pack(
+            MAGIC,
+            FORMAT_VERSION,
+            snapshot.version,
+            snapshot.built_at,
+            len(snapshot.ips),
+        ),
+    ]
+
+    for ip in snapshot.ips:
+        packed = ip_address(ip).packed
+        chunks.append(b"\x04" + packed if len(packed) == 4 else b"\x06" + packed)
+        chunks.append(_EXPIRY.pack(expires_at.get(ip, math.inf)))
+
+    payload = b"".join(chunks)
+    return payload + _CRC.pack(zlib.crc32(payload))
+
+
+def decode_snapshot(data: bytes) -> tuple[BlacklistSnapshot, dict[str, float]]:
+    """The snapshot and the expires_at (epoch seconds) of each of its IPs."""
+    if len(data) < _HEADER.size + _CRC.size:
+        raise SnapshotFormatError("snapshot file is truncated")
+
+    payload, (crc,) = data[: -_CRC.size], _CRC.unpack(data[-_CRC.size:])
+    if zlib.crc32(payload) != crc:
+        raise SnapshotFormatError("snapshot checksum mismatch")
+
+    magic, format_version, version, built_at, count = _HEADER.unpack_from(payload)
+    if magic != MAGIC:
+        raise SnapshotFormatError("not a blacklist snapshot")
+    if format_version != FORMAT_VERSION:
+        raise SnapshotFormatError(f"unsupported snapshot format {format_version}")
+
+    ips: list[str] = []
+    expires_at: dict[str, float] = {}
+    offset = _HEADER.size
+    view = memoryview(payload)
+    for _ in range(count):
+        if offset >= len(payload):
+            raise SnapshotFormatError("snapshot entries are truncated")
+
+        family = view[offset]
+        if family == 4:
+            ip = socket.inet_ntoa(view[offset + 1 : offset + 5])
+            offset += 5
+        elif family == 6:
+            ip = str(IPv6Address(bytes(view[offset + 1 : offset + 17])))
+            offset += 17
+        else:
+            raise SnapshotFormatError(f"bad address family {family}")
+
+        try:
+            (expires_at[ip],) = _EXPIRY.unpack_from(payload, offset)
+        except struct.error:
+            raise SnapshotFormatError("snapshot entries are truncated")
+        offset += _EXPIRY.size
+        ips.append(ip)
+
+    if offset != len(payload):
+        raise SnapshotFormatError("trailing data in snapshot")
+
+    ip_tuple = tuple(ips)
+    snapshot = BlacklistSnapshot(
+        ips=ip_tuple,
+        version=version,
+        built_at=built_at,
+        rendered=render_blacklist(ip_tuple),
+    )
+    return snapshot, expires_at
+
+
+def write_snapshot(
+    path: str,
+    snapshot: BlacklistSnapshot,
+    expires_at: Mapping[str, float],
+) -> bool:
+    """Write atomically: a crash mid-write leaves the previous file intact.
+
+    One writer per path at a time, across processes, serialised on an
+    flock of `{path}.lock`. Returns False without writing when another
+    writer holds it.
+    """
+    with open(f"{path}.lock", "a") as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return False
+
+        fd, tmp_path = tempfile.mkstemp(
+            dir=os.path.dirname(path) or ".",
+            prefix=f".{os.path.basename(path)}.",
+            suffix=".tmp",
+        )
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(encode_snapshot(snapshot, expires_at))
+                f.flush()
+                os.fsync(f.fileno())
+
+            os.replace(tmp_path, path)
+        except BaseException:
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(tmp_path)
+            raise
+
+        return True
+
+
+def read_snapshot(path: str) -> tuple[BlacklistSnapshot, dict[str, float]] | None:
+    try:
+        with open(path, "rb") as f:
+            return decode_snapshot(f.read())
+    except FileNotFoundError:
+        return None
+    except (OSError, SnapshotFormatError) as e:
+        logger.warning(f"Ignoring unreadable blacklist snapshot {path}: {e}")
+        return None
+
+
+class SnapshotPersister:
+    """Writes the blacklist snapshot to `path` whenever its version moved."""
+
+    def __init__(self, path: str) -> None:
+        self._path = path
+        self._persisted_version: int | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self._path)
+
+    async def load(self) -> tuple[BlacklistSnapshot, dict[str, float]] | None:
+        if not self.enabled:
+            return None
+
+        loaded = await asyncio.to_thread(read_snapshot, self._path)
+        if loaded is not None:
+            self._persisted_version = loaded[0].version
+        return loaded
+
+    async def persist(
+        self,
+        snapshot: BlacklistSnapshot,
+        expires_at: Mapping[str, float],
+    ) -> bool:
+        """`expires_at` must not be mutated while the write runs in its
+        thread; pass a copy."""
+        if not self.enabled or snapshot.version == self._persisted_version:
+            return False
+
+        if not await asyncio.to_thread(
+            write_snapshot,
+            self._path,
+            snapshot,
+            expires_at,
+        ):
+            # Another process is writing this path; retry on the next call.
+            return False
+
+        self._persisted_version = snapshot.version
+        return True
+
+
+snapshot_persister = SnapshotPersister(path=settings.BLACKLIST_SNAPSHOT_PATH)
@@ -0,0 +1,91 @@
+import asyncio
+from types import TracebackType
+from typing import TYPE_CHECKING, Callable
+
+from sqlalchemy.engine import URL
+
+if TYPE_CHECKING:
+    import asyncpg
+
+
+class NotificationListener:
+    """LISTEN on `channel` over a connection of its own.
+
+    The connection is opened with asyncpg directly rather than taken from
+    the SQLAlchemy pool: it's held for as long as the process listens, and
+    pool recycling or pre-ping would close it under the listener.
+
+    Notifications are only delivered while the connection is up; whoever
+    listens has to resync after `wait_lost` returns or raises.
+    """
+
+    def __init__(
+        self,
+        url: URL,
+        channel: str,
+        on_payload: Callable[[str], None],
+    ) -> None:
+        self._url = url
+        self._channel = channel
+        self._on_payload = on_payload
+        self._connection: "asyncpg.Connection | None" = None
+        self._lost: asyncio.Future[None] | None = None
+
+    async def __aenter__(self) -> "NotificationListener":
+        # Only needed once the app is running, keep it out of worker imports.
+        import asyncpg
+
+        url = self._url
+        self._lost = asyncio.get_running_loop().create_future()
+        self._connection = await asyncpg.connect(
+            host=url.host,
+            port=url.port,
+            user=url.username,
+            password=url.password,
+            database=url.database,
+        )
+        self._connection.add_termination_listener(self._on_termination)
+        await self._connection.add_listener(self._channel, self._on_notification)
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        connection, self._connection = self._connection, None
+        if connection is None or connection.is_closed():
+            return
+
+        try:
+            await connection.close(timeout=5)
+        except Exception:
+            connection.terminate()
+
+    def _on_notification(
+        self,
+        connection: "asyncpg.Connection",
+        pid: int,
+        channel: str,
+        payload: str,
+    ) -> None:
+        self._on_payload(payload)
+
+    def _on_termination(self, connection: "asyncpg.Connection") -> None:
+        if self._lost is not None and not self._lost.done():
+            self._lost.set_result(None)
+
+    async def wait_lost(self, keepalive: float) -> None:
+        """Return once the connection is gone.
+
+        A connection dropped without a FIN only fails when it's used, so it
+        is pinged every `keepalive` seconds; a failed ping raises.
+        """
+        assert self._lost is not None and self._connection is not None
+
+        while not self._lost.done():
+            try:
+                await asyncio.wait_for(asyncio.shield(self._lost), timeout=keepalive)
+            except asyncio.TimeoutError:
+                await self._connection.fetchval("SELECT 1", timeout=keepalive)
@@ -1,4 +1,4 @@
-from contextlib import AsyncExitStack, asynccontextmanager
+from contextlib import asynccontextmanager
 from typing import AsyncIterator
 
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
@@ -21,32 +21,21 @@ class BaseDBManager:
         return self._async_session.begin()
 
     @asynccontextmanager
-    async def _manage_async_session(
+    async def use_or_create_session(
         self,
         current_session: AsyncSession | None = None,
     ) -> AsyncIterator[AsyncSession]:
-        async with AsyncExitStack() as stack:
-            if current_session is None:
-                session = await stack.enter_async_context(self._async_session())
-            else:
-                session = current_session
-
-            try:
-                yield session
+        """Run on the caller's session, or on a new session whose
+        transaction commits on success and rolls back on error.
 
-            except Exception:
-                await session.rollback()
-                raise
+        A passed-in session belongs to a unit of work: it's neither committed
+        nor rolled back here, its owner decides once for all the calls.
+        """
+        if current_session is not None:
+            yield current_session
+            return
 
-            else:
-                await session.commit()
-
-    @asynccontextmanager
-    async def use_or_create_session(
-        self,
-        current_session: AsyncSession | None = None,
-    ) -> AsyncIterator[AsyncSession]:
-        async with self._manage_async_session(current_session) as session:
+        async with self._async_session.begin() as session:
             yield session
 
     async def close(self) -> None:
@@ -1,13 +1,18 @@
+import asyncio
 import logging
+from typing import TYPE_CHECKING, Any
 
-from alembic.command import upgrade
-from alembic.config import Config
 from sqlalchemy import Connection, text
 from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import QueuePool
 
 import settings
 from src.db.managers.base_manager import BaseDBManager
 from src.db.managers.ip_address_manager import IPAddressDBManager
+from src.db.tracing import sql_tracer
+
+if TYPE_CHECKING:
+    from alembic.config import Config
 
 logger = logging.getLogger(__name__)
 
@@ -23,17 +28,42 @@ class DBManager(BaseDBManager):
 
     async def healthcheck(self) -> bool:
         try:
-            async with self.session() as session:
-                await session.execute(
-                    text("CREATE TEMP TABLE healthcheck (id SERIAL PRIMARY KEY)")
-                )
-                await session.execute(text("DROP TABLE healthcheck"))
+            async with self._async_engine.connect() as connection:
+                await connection.execute(text("SELECT 1"))
                 return True
 
         except Exception:
             logger.exception("db healthcheck failed")
             return False
 
+    async def warmup(self, connections: int) -> None:
+        """Open up to `connections` pooled connections concurrently so the
+        first requests don't pay for connection establishment."""
+        connections = min(connections, settings.DB_MAX_CONNECTIONS)
+
+        async def _open() -> None:
+            async with self._async_engine.connect() as connection:
+                await connection.execute(text("SELECT 1"))
+
+        await asyncio.gather(*(_open() for _ in range(connections)))
+
+    def pool_status(self) -> dict[str, Any]:
+        pool = self._async_engine.pool
+        if not isinstance(pool, QueuePool):
+            return {"pool": pool.status()}
+
+        capacity = pool.size() + max(settings.DB_MAX_OVERFLOW, 0)
+        checked_out = pool.checkedout()
+
+        return {
+            "size": pool.size(),
+            "capacity": capacity,
+            "checked_out": checked_out,
+            "checked_in": pool.checkedin(),
+            "overflow": pool.overflow(),
+            "saturation": round(checked_out / capacity, 3) if capacity else 0.0,
+        }
+
 
 async def init_db_manager(
     db_connection_url: str,
@@ -43,11 +73,18 @@ async def init_db_manager(
         url=db_connection_url,
         pool_pre_ping=True,
         pool_size=settings.DB_MAX_CONNECTIONS,
+        max_overflow=settings.DB_MAX_OVERFLOW,
     )
 
+    if settings.SQL_TRACING_ENABLED:
+        sql_tracer.install(engine.sync_engine)
+
     if run_migrations:
+        # Alembic is heavy and only needed here, keep it out of worker imports.
+        from alembic.command import upgrade
+        from alembic.config import Config
 
-        def run_upgrade(connection: Connection, alembic_config: Config) -> None:
+        def run_upgrade(connection: Connection, alembic_config: "Config") -> None:
             alembic_config.attributes["connection"] = connection
             alembic_config.attributes["skip_logging_configuration"] = "True"
             upgrade(alembic_config, "head")
@@ -1,15 +1,50 @@
+import json
+import logging
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import Any
-
-from sqlalchemy import and_, delete, or_, select, update
-from sqlalchemy.dialects.postgresql import insert
-from sqlalchemy.ext.asyncio import AsyncEngine
+from typing import Any, AsyncIterator, Callable
+
+from sqlalchemy import (
+    DateTime,
+    Integer,
+    String,
+    Text,
+    bindparam,
+    cast,
+    delete,
+    select,
+    text,
+    update,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, INET, insert
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
 from sqlalchemy.ext.asyncio.session import AsyncSession
+from sqlalchemy.orm import aliased
 from sqlalchemy.sql import func
 
-from src.common.enums import IPStatus
+import settings
+from src.common.blacklist_events import EventOp
+from src.common.enums import IPEventType, IPStatus
+from src.common.ip_validation import parse_address
+from src.db.listener import NotificationListener
 from src.db.managers.base_manager import BaseDBManager
-from src.db.models import IPAddress
+from src.db.models import IPAddress, IPAddressEvent
+from src.db.partitions import (
+    DEFAULT_PARTITION,
+    PARTITION_MAINTENANCE_LOCK,
+    PARTITION_SPAN,
+    PARTITIONED_TABLE,
+    partition_bounds,
+    partition_name,
+    week_start,
+)
+
+logger = logging.getLogger(__name__)
+
+# Channel of the ip_address_notify_blacklist trigger, see migration 7.
+BLACKLIST_CHANNEL = "ip_address_blacklist"
+
+BlacklistChangeHandler = Callable[[EventOp, str, datetime | None], None]
 
 
 class IPAddressDBManager(BaseDBManager):
@@ -40,23 +75,39 @@ class IPAddressDBManager(BaseDBManager):
         async with self.use_or_create_session(
             current_session=current_session,
         ) as session:
-            statement = (
-                insert(IPAddress)
-                .values(**values)
-                .on_conflict_do_update(
-                    index_elements=["ip"],
-                    set_={
-                        "status": values.get("status"),
-                        "description": values.get("description"),
-                        "created_at": values.get("created_at"),
-                        "last_blacklist_at": values.get("last_blacklist_at"),
-                        "expires_at": values.get("expires_at"),
-                        "updated_at": func.now(),
-                    },
-                )
-                .returning(IPAddress)
+            return await self._upsert(session, values)
+
+    async def _upsert(
+        self,
+        session: AsyncSession,
+        values: dict[str, Any],
+    ) -> IPAddress | None:
+        # ON CONFLICT needs a unique index on `ip`, which a table partitioned
+        # by expires_at can't have. Serialize writers of the same IP on the
+        # advisory lock the ip_address_unique_ip trigger takes instead.
+        await session.execute(
+            select(
+                func.pg_advisory_xact_lock(
+                    func.hashtextextended(func.host(cast(values["ip"], INET)), 0),
+                ),
+            ),
+        )
+
+        updated = await session.scalar(
+            update(IPAddress)
+            .where(IPAddress.ip == values["ip"])
+            .values(
+                **{k: v for k, v in values.items() if k != "ip"},
+                updated_at=func.now(),
             )
-            return await session.scalar(statement=statement)
+            .returning(IPAddress),
+        )
+        if updated is not None:
+            return updated
+
+        return await session.scalar(
+            insert(IPAddress).values(**values).returning(IPAddress),
+        )
 
     async def get_ip_address(
         self,
@@ -97,12 +148,7 @@ class IPAddressDBManager(BaseDBManager):
         async with self.use_or_create_session(
             current_session=current_session,
         ) as session:
-            query = select(IPAddress).where(
-                or_(
-                    IPAddress.expires_at.is_(None),
-                    IPAddress.expires_at > datetime.now(),
-                ),
-            )
+            query = select(IPAddress).where(IPAddress.expires_at > datetime.now())
 
             if status:
                 query = query.where(IPAddress.status == status.value)
@@ -120,13 +166,62 @@ class IPAddressDBManager(BaseDBManager):
         async with self.use_or_create_session(
             current_session=current_session,
         ) as session:
-            query = select(IPAddress.ip).where(IPAddress.status == IPStatus.BLACKLIST)
+            query = select(IPAddress.ip).where(
+                IPAddress.status == IPStatus.BLACKLIST,
+                IPAddress.expires_at > func.now(),
+            )
 
             query = query.order_by(IPAddress.last_blacklist_at.desc())
 
             result = await session.execute(query)
             return [str(row[0]) for row in result.all()]
 
+    def listen_blacklist_changes(
+        self,
+        on_change: BlacklistChangeHandler,
+    ) -> NotificationListener:
+        """Listener calling `on_change(op, ip, expires_at)` for each IP that
+        enters ("add") or leaves ("remove") the blacklist, in commit order.
+        A re-blacklisted IP is announced as "add" again."""
+
+        def on_payload(payload: str) -> None:
+            try:
+                change = json.loads(payload)
+                expires_at = change.get("expires_at")
+                if expires_at == "infinity":
+                    expires_at = datetime.max
+                elif expires_at is not None:
+                    expires_at = datetime.fromisoformat(expires_at)
+                on_change(change["op"], change["ip"], expires_at)
+            except (ValueError, KeyError) as e:
+                logger.error(f"Ignoring malformed blacklist change {payload!r}: {e}")
+
+        return NotificationListener(
+            url=self._async_engine.url,
+            channel=BLACKLIST_CHANNEL,
+            on_payload=on_payload,
+        )
+
+    async def get_blacklist_entries(
+        self,
+        current_session: AsyncSession | None = None,
+    ) -> list[tuple[str, datetime]]:
+        """(ip, expires_at) of the blacklisted IPs, in feed order."""
+        async with self.use_or_create_session(
+            current_session=current_session,
+        ) as session:
+            query = (
+                select(IPAddress.ip, IPAddress.expires_at)
+                .where(
+                    IPAddress.status == IPStatus.BLACKLIST,
+                    IPAddress.expires_at > func.now(),
+                )
+                .order_by(IPAddress.last_blacklist_at.desc())
+            )
+
+            result = await session.execute(query)
+            return [(str(ip), expires_at) for ip, expires_at in result.all()]
+
     async def patch_ip_address(
         self,
         id: str | None = None,
@@ -195,62 +290,498 @@ class IPAddressDBManager(BaseDBManager):
 
             await session.execute(query)
 
+    async def _lock_ips(self, session: AsyncSession, ips: list[str]) -> None:
+        """Take the per-IP advisory lock of _upsert and the uniqueness
+        trigger for every IP, ordered by the lock key itself.
+
+        Every multi-IP writer goes through here so they all lock in the same
+        order and can't deadlock each other. The ORDER BY sits on the query
+        calling the lock function; Postgres evaluates volatile select-list
+        functions after the sort.
+        """
+        await session.execute(
+            text(
+                "SELECT pg_advisory_xact_lock(k.key) FROM ("
+                "SELECT DISTINCT hashtextextended(host(CAST(ip_text AS inet)), 0) AS key "
+                "FROM unnest(:ips) AS u(ip_text)"
+                ") AS k ORDER BY k.key"
+            ).bindparams(bindparam("ips", type_=ARRAY(Text))),
+            {"ips": ips},
+        )
+
+    async def record_sightings(
+        self,
+        sightings: list[tuple[str, int, datetime]],
+        promote_threshold: int,
+        expires_at: datetime,
+        current_session: AsyncSession | None = None,
+    ) -> list[str]:
+        """Apply aggregated (ip, hits, last_seen) counts in three set-based
+        statements: lock, bump existing rows, insert the rest as PENDING.
+
+        PENDING rows reaching `promote_threshold` hits are blacklisted.
+        Returns the IPs that were inserted.
+        """
+        if not sightings:
+            return []
+
+        ips, hits, last_seen = (list(column) for column in zip(*sightings))
+        params = {
+            "ips": ips,
+            "hits": hits,
+            "last_seen": last_seen,
+            "threshold": promote_threshold,
+            "pending": IPStatus.PENDING.value,
+            "blacklisted": IPStatus.BLACKLIST.value,
+        }
+        typed_params = (
+            bindparam("ips", type_=ARRAY(Text)),
+            bindparam("hits", type_=ARRAY(Integer)),
+            bindparam("last_seen", type_=ARRAY(DateTime)),
+            bindparam("threshold", type_=Integer),
+            bindparam("pending", type_=String),
+            bindparam("blacklisted", type_=String),
+        )
+        sightings_source = (
+            "unnest(:ips, :hits, :last_seen) AS s(ip_text, hits, last_seen)"
+        )
+
+        async with self.use_or_create_session(
+            current_session=current_session,
+        ) as session:
+            await self._lock_ips(session, ips)
+
+            updated = await session.execute(
+                text(
+                    "UPDATE ip_address SET "
+                    "hit_count = ip_address.hit_count + s.hits, "
+                    "last_seen_at = GREATEST(ip_address.last_seen_at, s.last_seen), "
+                    "status = CASE WHEN ip_address.status = :pending "
+                    "AND ip_address.hit_count + s.hits >= :threshold "
+                    "THEN :blacklisted ELSE ip_address.status END, "
+                    "last_blacklist_at = CASE WHEN ip_address.status = :pending "
+                    "AND ip_address.hit_count + s.hits >= :threshold "
+                    "THEN now() ELSE ip_address.last_blacklist_at END, "
+                    "updated_at = now() "
+                    f"FROM {sightings_source} "
+                    "WHERE ip_address.ip = CAST(s.ip_text AS inet) "
+                    "RETURNING s.ip_text"
+                ).bindparams(*typed_params),
+                params,
+            )
+            existing = {row[0] for row in updated.all()}
+
+            new = [sighting for sighting in sightings if sighting[0] not in existing]
+            if not new:
+                return []
+
+            new_ips, new_hits, new_last_seen = (list(column) for column in zip(*new))
+            await session.execute(
+                text(
+                    "INSERT INTO ip_address "
+                    "(ip, status, hit_count, last_seen_at, last_blacklist_at, expires_at) "
+                    "SELECT CAST(s.ip_text AS inet), "
+                    "CASE WHEN s.hits >= :threshold THEN :blacklisted ELSE :pending END, "
+                    "s.hits, s.last_seen, "
+                    "CASE WHEN s.hits >= :threshold THEN now() END, "
+                    ":expires_at "
+                    f"FROM {sightings_source}"
+                ).bindparams(
+                    *typed_params,
+                    bindparam("expires_at", type_=DateTime),
+                ),
+                {
+                    **params,
+                    "ips": new_ips,
+                    "hits": new_hits,
+                    "last_seen": new_last_seen,
+                    "expires_at": expires_at,
+                },
+            )
+            await self._insert_events(
+                session,
+                [(ip, IPEventType.ADDED, "sightings", expires_at) for ip in new_ips],
+            )
+
+            return new_ips
+
     async def cleanup_expired(
         self,
         current_session: AsyncSession | None = None,
+    ) -> list[str]:
+        """Drop fully expired weekly partitions, then delete the expired rows
+        left in the current week's partition.
+
+        Partitions are dropped in transactions of their own, never in
+        `current_session`, which only gets the row deletes. Returns the IPs
+        deleted row by row; IPs in dropped partitions are not enumerated.
+        Neither writes events: expiries are inferred from the expires_at of
+        the events that set it, see `get_ip_events`.
+        """
+        await self._drop_expired_partitions()
+
+        async with self.use_or_create_session(
+            current_session=current_session,
+        ) as session:
+            statement = (
+                delete(IPAddress)
+                .where(IPAddress.expires_at <= func.now())
+                .returning(IPAddress.ip)
+            )
+
+            result = await session.execute(statement)
+            return [str(row[0]) for row in result.all()]
+
+    async def _insert_events(
+        self,
+        session: AsyncSession,
+        events: list[tuple[str, IPEventType, str | None, datetime | None]],
+    ) -> None:
+        """Append (ip, event, reason, expires_at) events with one set-based
+        INSERT however many there are."""
+        if not events:
+            return
+
+        ips, event_types, reasons, expires_at = (
+            list(column) for column in zip(*events)
+        )
+        await session.execute(
+            text(
+                "INSERT INTO ip_address_event (ip, event, reason, expires_at) "
+                "SELECT CAST(e.ip_text AS inet), e.event, e.reason, e.expires_at "
+                "FROM unnest(:ips, :events, :reasons, :expires_at) "
+                "AS e(ip_text, event, reason, expires_at)"
+            ).bindparams(
+                bindparam("ips", type_=ARRAY(Text)),
+                bindparam("events", type_=ARRAY(String)),
+                bindparam("reasons", type_=ARRAY(Text)),
+                bindparam("expires_at", type_=ARRAY(DateTime)),
+            ),
+            {
+                "ips": ips,
+                "events": [event_type.value for event_type in event_types],
+                "reasons": reasons,
+                "expires_at": expires_at,
+            },
+        )
+
+    async def add_ip_events(
+        self,
+        events: list[tuple[str, IPEventType, str | None, datetime | None]],
+        current_session: AsyncSession | None = None,
     ) -> None:
         async with self.use_or_create_session(
             current_session=current_session,
         ) as session:
-            statement = delete(IPAddress).where(
-                and_(
-                    IPAddress.expires_at.is_not(None),
-                    IPAddress.expires_at <= func.now(),
+            await self._insert_events(session, events)
+
+    async def get_ip_events(
+        self,
+        ip: str,
+        before_id: int | None = None,
+        limit: int = 50,
+        current_session: AsyncSession | None = None,
+    ) -> list[tuple[IPAddressEvent, datetime | None]]:
+        """Newest first, keyset-paginated on the event id, each with the
+        created_at of the IP's next event (None for the latest one), which
+        bounds when the row it describes could have expired."""
+        next_event = aliased(IPAddressEvent)
+        superseded_at = (
+            select(next_event.created_at)
+            .where(
+                next_event.ip == IPAddressEvent.ip,
+                next_event.id > IPAddressEvent.id,
+            )
+            .order_by(next_event.id)
+            .limit(1)
+            .scalar_subquery()
+        )
+
+        async with self.use_or_create_session(
+            current_session=current_session,
+        ) as session:
+            query = select(IPAddressEvent, superseded_at).where(
+                IPAddressEvent.ip == ip,
+            )
+
+            if before_id is not None:
+                query = query.where(IPAddressEvent.id < before_id)
+
+            query = query.order_by(IPAddressEvent.id.desc()).limit(limit)
+
+            result = await session.execute(query)
+            return [(event, next_at) for event, next_at in result.all()]
+
+    async def purge_ip_events(self, older_than: datetime, batch_size: int) -> int:
+        """Delete events created before `older_than`, oldest first, in
+        transactions of at most `batch_size` rows; returns how many.
+
+        Ids follow creation order, so the purge is an id range found once
+        and walked on the primary key.
+        """
+        async with self.session() as session:
+            # The first event that stays; past the last id if none does.
+            upper_id = await session.scalar(
+                text(
+                    "SELECT coalesce("
+                    "(SELECT id FROM ip_address_event "
+                    "WHERE created_at >= :older_than ORDER BY id LIMIT 1), "
+                    "(SELECT max(id) + 1 FROM ip_address_event))"
                 ),
+                {"older_than": older_than},
             )
 
-            await session.execute(statement)
+        if upper_id is None:
+            return 0
+
+        purged = 0
+        while True:
+            async with self.session() as session:
+                result = await session.execute(
+                    text(
+                        "DELETE FROM ip_address_event WHERE id IN ("
+                        "SELECT id FROM ip_address_event WHERE id < :upper_id "
+                        "ORDER BY id LIMIT :batch_size)"
+                    ),
+                    {"upper_id": upper_id, "batch_size": batch_size},
+                )
+            purged += result.rowcount
+            if result.rowcount < batch_size:
+                return purged
+
+    async def ensure_partitions(self, weeks_ahead: int) -> list[str]:
+        """Create any missing weekly partitions from the current week up to
+        `weeks_ahead` weeks from now, each in its own short transaction."""
+        async with self._maintenance_connection() as connection:
+            if connection is None:
+                return []
+
+            async with connection.begin():
+                existing = set(await self._partition_names(connection))
+
+            created: list[str] = []
+            lower = week_start(datetime.now())
+            for _ in range(weeks_ahead + 1):
+                name = partition_name(lower)
+                if name not in existing:
+                    async with connection.begin():
+                        await self._create_partition(connection, name, lower)
+                    created.append(name)
+                lower += PARTITION_SPAN
+
+            return created
+
+    @asynccontextmanager
+    async def _maintenance_connection(self) -> AsyncIterator[AsyncConnection | None]:
+        """A connection holding the session-level partition maintenance
+        lock for as long as it's open; None when another session has it.
+
+        The lock outlives the per-partition transactions run on the
+        connection, and goes away with the connection if it breaks.
+        """
+        async with self._async_engine.connect() as connection:
+            async with connection.begin():
+                acquired = await connection.scalar(
+                    text("SELECT pg_try_advisory_lock(:key)"),
+                    {"key": PARTITION_MAINTENANCE_LOCK},
+                )
+            if not acquired:
+                yield None
+                return
+
+            try:
+                yield connection
+            finally:
+                async with connection.begin():
+                    await connection.execute(
+                        text("SELECT pg_advisory_unlock(:key)"),
+                        {"key": PARTITION_MAINTENANCE_LOCK},
+                    )
+
+    async def _limit_lock_wait(self, connection: AsyncConnection) -> None:
+        # A DDL lock request queued behind a long reader blocks every
+        # statement queued behind it; give up and retry on the next run.
+        timeout_ms = int(settings.PARTITION_DDL_LOCK_TIMEOUT * 1000)
+        await connection.execute(text(f"SET LOCAL lock_timeout = {timeout_ms}"))
+
+    async def _partition_names(self, connection: AsyncConnection) -> list[str]:
+        result = await connection.execute(
+            text(
+                "SELECT c.relname FROM pg_inherits i "
+                "JOIN pg_class c ON c.oid = i.inhrelid "
+                "WHERE i.inhparent = CAST(:table AS regclass)"
+            ),
+            {"table": PARTITIONED_TABLE},
+        )
+        return [row[0] for row in result.all()]
+
+    async def _create_partition(
+        self,
+        connection: AsyncConnection,
+        name: str,
+        lower: datetime,
+    ) -> None:
+        """Build the partition as a standalone table and ATTACH it.
+
+        CREATE TABLE ... PARTITION OF and DETACH take ACCESS EXCLUSIVE on
+        ip_address; ATTACH only takes SHARE UPDATE EXCLUSIVE there, which
+        doesn't block reads or writes. The CHECK constraint spares ATTACH a
+        scan of the new table. ATTACH still locks and scans the default
+        partition, which only holds rows past the pre-created horizon
+        (non-expiring rows have a partition of their own), and the rows of
+        the new range are moved out of it in the same transaction.
+        """
+        upper = lower + PARTITION_SPAN
+        bounds = {"lower": lower, "upper": upper}
+
+        await self._limit_lock_wait(connection)
+        await connection.execute(
+            text(
+                f"CREATE TABLE {name} "
+                f"(LIKE {PARTITIONED_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+            ),
+        )
+        await connection.execute(
+            text(
+                f"ALTER TABLE {name} ADD CONSTRAINT {name}_bounds "
+                f"CHECK (expires_at >= '{lower.isoformat()}' "
+                f"AND expires_at < '{upper.isoformat()}')"
+            ),
+        )
+        # Moving rows isn't a blacklist change (see migration 7).
+        await connection.execute(text("SET LOCAL ip_address.notify = 'off'"))
+        await connection.execute(
+            text(
+                f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+                "WHERE expires_at >= :lower AND expires_at < :upper RETURNING *) "
+                f"INSERT INTO {name} SELECT * FROM moved"
+            ),
+            bounds,
+        )
+        await connection.execute(
+            text(
+                f"ALTER TABLE {PARTITIONED_TABLE} ATTACH PARTITION {name} "
+                f"FOR VALUES FROM ('{lower.isoformat()}') TO ('{upper.isoformat()}')"
+            ),
+        )
+
+    async def _drop_expired_partitions(self) -> list[str]:
+        """Detach and drop every fully expired weekly partition, each in its
+        own transaction.
+
+        DETACH ... CONCURRENTLY isn't allowed next to a default partition,
+        so each drop holds ACCESS EXCLUSIVE on ip_address, but only for a
+        catalog change committed right away.
+        """
+        async with self._maintenance_connection() as connection:
+            if connection is None:
+                return []
+
+            async with connection.begin():
+                names = await self._partition_names(connection)
+
+            now = datetime.now()
+            dropped: list[str] = []
+            for name in names:
+                bounds = partition_bounds(name)
+                if bounds is None or bounds[1] > now:
+                    continue
+
+                # No per-row EXPIRED events: the history infers them.
+                async with connection.begin():
+                    await self._limit_lock_wait(connection)
+                    await connection.execute(
+                        text(f"ALTER TABLE {PARTITIONED_TABLE} DETACH PARTITION {name}"),
+                    )
+                    await connection.execute(text(f"DROP TABLE {name}"))
+                dropped.append(name)
+
+            return dropped
 
     async def bulk_add_ip_addresses(
         self,
         ip_addresses: list[dict[str, Any]],
         current_session: AsyncSession | None = None,
     ) -> list[IPAddress]:
+        """Upsert a batch in three set-based statements, like
+        record_sightings: lock, update the existing rows, insert the rest.
+
+        Fields left out (or None) keep their current value on existing rows.
+        A repeated address counts once, with its last values.
+        """
         if not ip_addresses:
             return []
 
+        rows: dict[str, dict[str, Any]] = {}
+        for ip_data in ip_addresses:
+            status = ip_data.get("status", IPStatus.BLACKLIST)
+            rows[parse_address(ip_data["ip"]).normalized] = {
+                "status": status.value if hasattr(status, "value") else status,
+                "description": ip_data.get("description"),
+                "last_blacklist_at": ip_data.get("last_blacklist_at"),
+                "expires_at": ip_data.get("expires_at"),
+            }
+
+        params = {
+            "ips": list(rows),
+            "statuses": [row["status"] for row in rows.values()],
+            "descriptions": [row["description"] for row in rows.values()],
+            "last_blacklist_at": [row["last_blacklist_at"] for row in rows.values()],
+            "expires_at": [row["expires_at"] for row in rows.values()],
+        }
+        typed_params = (
+            bindparam("ips", type_=ARRAY(Text)),
+            bindparam("statuses", type_=ARRAY(String)),
+            bindparam("descriptions", type_=ARRAY(Text)),
+            bindparam("last_blacklist_at", type_=ARRAY(DateTime)),
+            bindparam("expires_at", type_=ARRAY(DateTime)),
+        )
+        source = (
+            "unnest(:ips, :statuses, :descriptions, :last_blacklist_at, :expires_at) "
+            "AS v(ip_text, status, description, last_blacklist_at, expires_at)"
+        )
+
         async with self.use_or_create_session(
             current_session=current_session,
         ) as session:
-            values: list[dict[str, Any]] = []
-            for ip_data in ip_addresses:
-                values.append(
-                    {
-                        "ip": ip_data["ip"],
-                        "status": ip_data.get("status", IPStatus.BLACKLIST),
-                        "description": ip_data.get("description"),
-                        "last_blacklist_at": ip_data.get("last_blacklist_at"),
-                        "expires_at": ip_data.get("expires_at"),
-                    },
-                )
-
-            statement = (
-                insert(IPAddress)
-                .values(values)
-                .on_conflict_do_update(
-                    constraint="uq_ip",
-                    set_={
-                        "status": insert(IPAddress).excluded.status,
-                        "description": insert(IPAddress).excluded.description,
-                        "last_blacklist_at": insert(
-                            IPAddress,
-                        ).excluded.last_blacklist_at,
-                        "expires_at": insert(IPAddress).excluded.expires_at,
-                        "updated_at": func.now(),
-                    },
-                )
-                .returning(IPAddress)
+            await self._lock_ips(session, params["ips"])
+
+            updated = await session.scalars(
+                select(IPAddress).from_statement(
+                    text(
+                        "UPDATE ip_address SET "
+                        "status = v.status, "
+                        "description = COALESCE(v.description, ip_address.description), "
+                        "last_blacklist_at = COALESCE("
+                        "v.last_blacklist_at, ip_address.last_blacklist_at), "
+                        "expires_at = COALESCE(v.expires_at, ip_address.expires_at), "
+                        "updated_at = now() "
+                        f"FROM {source} "
+                        "WHERE ip_address.ip = CAST(v.ip_text AS inet) "
+                        "RETURNING ip_address.*"
+                    ).bindparams(*typed_params),
+                ),
+                params,
+            )
+            result = list(updated.all())
+
+            # Rows just updated are visible to this statement, so NOT EXISTS
+            # leaves exactly the new addresses.
+            inserted = await session.scalars(
+                select(IPAddress).from_statement(
+                    text(
+                        "INSERT INTO ip_address "
+                        "(ip, status, description, last_blacklist_at, expires_at) "
+                        "SELECT CAST(v.ip_text AS inet), v.status, v.description, "
+                        "v.last_blacklist_at, COALESCE(v.expires_at, 'infinity') "
+                        f"FROM {source} "
+                        "WHERE NOT EXISTS (SELECT 1 FROM ip_address "
+                        "WHERE ip_address.ip = CAST(v.ip_text AS inet)) "
+                        "RETURNING *"
+                    ).bindparams(*typed_params),
+                ),
+                params,
             )
+            result.extend(inserted.all())
 
-            result = await session.execute(statement)
-            return list(result.scalars().all())
+            return result
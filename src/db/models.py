@@ -1,17 +1,20 @@
 from datetime import datetime
 
 from sqlalchemy import (
+    BigInteger,
     DateTime,
+    Identity,
     Index,
+    Integer,
     String,
     Text,
-    UniqueConstraint,
+    text,
 )
 from sqlalchemy.dialects.postgresql import INET, UUID
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 from sqlalchemy.sql import func
 
-from src.common.enums import IPStatus
+from src.common.enums import IPEventType, IPStatus
 
 
 class Base(DeclarativeBase):
@@ -46,17 +49,65 @@ class IPAddress(Base):
         DateTime(timezone=False),
         nullable=True,
     )
-    expires_at: Mapped[datetime | None] = mapped_column(
+    hit_count: Mapped[int] = mapped_column(
+        Integer,
+        nullable=False,
+        server_default=text("0"),
+    )
+    last_seen_at: Mapped[datetime | None] = mapped_column(
         DateTime(timezone=False),
         nullable=True,
     )
 
+    # Partition key (weekly ranges, see src/db/partitions.py); 'infinity'
+    # means "never expires". Uniqueness of `ip` across partitions is enforced
+    # by the ip_address_unique_ip trigger, see migration 2.
+    expires_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=False),
+        primary_key=True,
+        nullable=False,
+        server_default=text("'infinity'"),
+    )
+
     __table_args__ = (
-        UniqueConstraint("ip", name="uq_ip"),
         Index(
             "ix_ip_gist",
             ip,
             postgresql_using="gist",
             postgresql_ops={"ip": "inet_ops"},
         ),
+        Index("ix_ip_address_ip", ip),
+        {"postgresql_partition_by": "RANGE (expires_at)"},
+    )
+
+
+class IPAddressEvent(Base):
+    """Append-only lifecycle history of an IP; deliberately not a foreign
+    key to ip_address so it outlives deleted and expired rows."""
+
+    __tablename__ = "ip_address_event"
+
+    id: Mapped[int] = mapped_column(
+        BigInteger,
+        Identity(always=True),
+        primary_key=True,
+    )
+    ip: Mapped[INET] = mapped_column(INET, nullable=False)
+    event: Mapped[IPEventType] = mapped_column(String, nullable=False)
+    reason: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=False),
+        nullable=False,
+        server_default=func.now(),
+    )
+    # expires_at the row got from an ADDED/REBLACKLISTED event. Expiries
+    # aren't written as rows (partitions are dropped without enumerating
+    # them); an EXPIRED entry is inferred from this when reading history.
+    expires_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=False),
+        nullable=True,
+    )
+
+    __table_args__ = (
+        Index("ix_ip_address_event_ip_id", ip, id.desc()),
     )
@@ -0,0 +1,32 @@
+from datetime import datetime, timedelta
+
+PARTITIONED_TABLE = "ip_address"
+DEFAULT_PARTITION = "ip_address_default"
+PARTITION_PREFIX = "ip_address_p"
+PARTITION_SPAN = timedelta(weeks=1)
+# Session-level advisory lock key serialising partition DDL across workers
+# and replicas; whoever doesn't get it skips the run.
+PARTITION_MAINTENANCE_LOCK = 0x69705F7061727473  # b"ip_parts"
+
+
+def week_start(moment: datetime) -> datetime:
+    """Monday 00:00 of the week containing `moment`."""
+    day = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    return day - timedelta(days=day.weekday())
+
+
+def partition_name(lower: datetime) -> str:
+    return f"{PARTITION_PREFIX}{lower:%Y%m%d}"
+
+
+def partition_bounds(name: str) -> tuple[datetime, datetime] | None:
+    """[lower, upper) of a weekly partition, None for anything else."""
+    if not name.startswith(PARTITION_PREFIX):
+        return None
+
+    try:
+        lower = datetime.strptime(name[len(PARTITION_PREFIX):], "%Y%m%d")
+    except ValueError:
+        return None
+
+    return lower, lower + PARTITION_SPAN
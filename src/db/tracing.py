@@ -0,0 +1,151 @@
+import logging
+import re
+import threading
+import time
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+import settings
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (ms) of the latency histogram buckets; the last one is +inf.
+HISTOGRAM_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+OVERFLOW_FINGERPRINT = "<other statements>"
+
+_PLACEHOLDER_RE = re.compile(r"\$\d+|%\(\w+\)s|%s")
+_VALUES_GROUPS_RE = re.compile(r"(\([^()]*\))(?:, \1)+")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def fingerprint(statement: str) -> str:
+    """Normalize a statement so that executions differing only in bound
+    parameters (or the number of multi-VALUES rows) share one fingerprint."""
+    statement = _WHITESPACE_RE.sub(" ", statement).strip()
+    statement = _PLACEHOLDER_RE.sub("?", statement)
+    return _VALUES_GROUPS_RE.sub(r"\1, ...", statement)
+
+
+def redact(parameters: Any) -> Any:  # noqa: ANN401
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [redact(value) for value in parameters]
+    return type(parameters).__name__
+
+
+@dataclass(slots=True)
+class StatementStats:
+    fingerprint: str
+    calls: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    rows: int = 0
+    histogram: list[int] = field(
+        default_factory=lambda: [0] * (len(HISTOGRAM_BUCKETS_MS) + 1),
+    )
+
+    def observe(self, elapsed_ms: float, rows: int) -> None:
+        self.calls += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.rows += max(rows, 0)
+        self.histogram[bisect_left(HISTOGRAM_BUCKETS_MS, elapsed_ms)] += 1
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "fingerprint": self.fingerprint,
+            "calls": self.calls,
+            "total_ms": round(self.total_ms, 3),
+            "mean_ms": round(self.total_ms / self.calls, 3) if self.calls else 0.0,
+            "max_ms": round(self.max_ms, 3),
+            "rows": self.rows,
+            "histogram": {
+                **{
+                    f"le_{bound}ms": count
+                    for bound, count in zip(HISTOGRAM_BUCKETS_MS, self.histogram)
+                },
+                "inf": self.histogram[-1],
+            },
+        }
+
+
+class SQLTracer:
+    """Per-fingerprint timing/row statistics fed by engine cursor events."""
+
+    def __init__(self, slow_query_ms: float, max_statements: int) -> None:
+        self._slow_query_ms = slow_query_ms
+        self._max_statements = max_statements
+        self._stats: dict[str, StatementStats] = {}
+        self._lock = threading.Lock()
+
+    def install(self, engine: Engine) -> None:
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+
+    def _before_cursor_execute(
+        self,
+        conn: Any,  # noqa: ANN401
+        cursor: Any,  # noqa: ANN401
+        statement: str,
+        parameters: Any,  # noqa: ANN401
+        context: Any,  # noqa: ANN401
+        executemany: bool,
+    ) -> None:
+        # On the execution context rather than the connection: a failing
+        # statement never reaches after_cursor_execute, and its context is
+        # discarded with it.
+        context._sql_trace_start = time.perf_counter()
+
+    def _after_cursor_execute(
+        self,
+        conn: Any,  # noqa: ANN401
+        cursor: Any,  # noqa: ANN401
+        statement: str,
+        parameters: Any,  # noqa: ANN401
+        context: Any,  # noqa: ANN401
+        executemany: bool,
+    ) -> None:
+        start = getattr(context, "_sql_trace_start", None)
+        if start is None:
+            return
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.record(statement, elapsed_ms, cursor.rowcount)
+
+        if elapsed_ms >= self._slow_query_ms:
+            logger.warning(
+                f"Slow query ({elapsed_ms:.1f} ms): "
+                f"{_WHITESPACE_RE.sub(' ', statement).strip()} "
+                f"parameters={redact(parameters)}"
+            )
+
+    def record(self, statement: str, elapsed_ms: float, rows: int) -> None:
+        key = fingerprint(statement)
+
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                if len(self._stats) >= self._max_statements:
+                    key = OVERFLOW_FINGERPRINT
+                stats = self._stats.setdefault(key, StatementStats(fingerprint=key))
+            stats.observe(elapsed_ms, rows)
+
+    def top(self, limit: int, order_by: str = "total_ms") -> list[dict[str, Any]]:
+        with self._lock:
+            stats = sorted(
+                self._stats.values(),
+                key=lambda s: getattr(s, order_by),
+                reverse=True,
+            )
+            return [s.as_dict() for s in stats[:limit]]
+
+
+sql_tracer = SQLTracer(
+    slow_query_ms=settings.SQL_SLOW_QUERY_MS,
+    max_statements=settings.SQL_TRACE_MAX_STATEMENTS,
+)
@@ -0,0 +1,65 @@
+import asyncio
+from datetime import datetime
+from typing import Any
+
+import pytest
+
+from src.bl.services import ip_address_service
+from src.bl.services.ip_address_service import IPAddressService
+from src.common.blacklist import BlacklistStore
+
+CONCURRENCY = 1000
+IPS = [f"1.2.{i // 256}.{i % 256}" for i in range(10_000)]
+
+
+class CountingIPAdapter:
+    def __init__(self, fail: bool = False) -> None:
+        self.queries = 0
+        self._fail = fail
+
+    async def get_blacklist_entries(
+        self,
+        **kwargs: Any,  # noqa: ANN401
+    ) -> list[tuple[str, datetime]]:
+        self.queries += 1
+        # Long enough for every caller to pile up behind the first one.
+        await asyncio.sleep(0.05)
+        if self._fail:
+            raise RuntimeError("database unavailable")
+        return [(ip, datetime.max) for ip in IPS]
+
+
+class StubAdaptersManager:
+    def __init__(self, ip_adapter: CountingIPAdapter) -> None:
+        self.ip_adapter = ip_adapter
+
+
+@pytest.fixture(autouse=True)
+def cold_blacklist_store(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(ip_address_service, "blacklist_store", BlacklistStore())
+
+
+async def _stampede(adapter: CountingIPAdapter) -> list[Any]:
+    service = IPAddressService(adapters_manager=StubAdaptersManager(adapter))  # type: ignore
+    return await asyncio.gather(
+        *(service.get_blacklist_feed() for _ in range(CONCURRENCY)),
+        return_exceptions=True,
+    )
+
+
+def test_concurrent_feed_reads_share_one_query() -> None:
+    adapter = CountingIPAdapter()
+
+    results = asyncio.run(_stampede(adapter))
+
+    assert adapter.queries == 1
+    assert all(result == "\n".join(IPS) + "\n" for result in results)
+
+
+def test_concurrent_feed_reads_share_one_error() -> None:
+    adapter = CountingIPAdapter(fail=True)
+
+    results = asyncio.run(_stampede(adapter))
+
+    assert adapter.queries == 1
+    assert all(isinstance(result, RuntimeError) for result in results)
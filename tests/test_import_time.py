@@ -0,0 +1,25 @@
+from benchmarks.import_time import FORBIDDEN_MODULES, profile_imports
+
+# Sum of the per-module self times of `import main` in a fresh interpreter.
+IMPORT_BUDGET_MS = 1000
+
+
+def _import_ms() -> tuple[float, set[str]]:
+    entries = profile_imports("main")
+    total_ms = sum(self_us for _, self_us, _ in entries) / 1000
+    return total_ms, {module for module, _, _ in entries}
+
+
+def test_import_main_within_budget() -> None:
+    # The first run may still be writing .pyc files; judge the faster one.
+    total_ms, _ = min(_import_ms(), _import_ms())
+
+    assert total_ms <= IMPORT_BUDGET_MS, (
+        f"`import main` took {total_ms:.0f} ms, budget {IMPORT_BUDGET_MS} ms"
+    )
+
+
+def test_import_main_skips_migration_tooling() -> None:
+    _, loaded = _import_ms()
+
+    assert not loaded & set(FORBIDDEN_MODULES)